@@ -1,19 +1,32 @@
 #!/usr/bin/env python3
+import argparse
 import functools
 import getpass
-import re
 import os
+import re
 import sys
 import enum
 
 if sys.platform != 'win32':
     import readline
 
+import game.boardpool as boardpool
 import game.environment as genv
+import game.geometry as geometry
+import game.movelog as movelog
+import game.render as render
+import game.simulation as simulation
+import game.snapshot as snapshot
 import network.twitter_access as tw_acces
 import game.utils as utils
 
 
+painter = None
+board_pool = None
+log_dir = None
+game_log = None
+
+
 class GameMode(enum.Enum):
     HOT_SEAT = 'hs'
     BOT = 'bot'
@@ -25,12 +38,14 @@ class ExitGame(Exception):
 
 class Game:
     def __init__(self, side=6, diff=0, ship_max=4, mode='bot', player_1='',
-                 player_2=''):
-        self.env = genv.Environment(side, diff, ship_max)
+                 player_2='', seed=None):
+        self.env = genv.Environment(side, diff, ship_max, seed)
         if sum(self.env.ship_cells) / genv.Honeycomb(side, genv.Player,
                                                      self.env).square > 0.3:
             print('Impossible size values. Game started with default size')
-            self.env = genv.Environment(6, diff, 4)
+            self.env = genv.Environment(6, diff, 4, seed)
+        if seed is None:
+            self.env.pool = board_pool
         self.mode = GameMode(mode)
         self.finish = False
 
@@ -41,7 +56,9 @@ class Game:
                 username = self.username_input('player')
             self.env.add_player(genv.PlayerType.USER, username)
             self.env.players[username].active = True
+            print('Bot field is being generated')
             self.env.add_player(genv.PlayerType.BOT, 'bot')
+            print('Field was generated successfully')
             print('New game with bot started. Enter command:')
         elif self.mode == GameMode.HOT_SEAT:
             if player_1:
@@ -57,6 +74,19 @@ class Game:
             self.env.add_player(genv.PlayerType.USER, username)
             print('New hot seat game started. Enter command:')
 
+    @classmethod
+    def load(cls, path):
+        """Game restored from the snapshot file at ``path``"""
+        env, mode = snapshot.load(path)
+        game = cls.__new__(cls)
+        game.env = env
+        game.mode = GameMode(mode)
+        game.finish = False
+        return game
+
+    def save(self, path):
+        snapshot.save(path, self.env, self.mode.value)
+
     def username_input(self, player_calling):
         username = ''
         while (not username or ' ' in username or
@@ -94,6 +124,23 @@ class Game:
         if player.is_fleet_placed() and self.mode == GameMode.HOT_SEAT:
             self.switch_players()
 
+    def show_hints(self, ship_len):
+        _, player = self.env.get_active_player()
+        if player.is_fleet_placed():
+            print('Fleet is already placed!')
+            return
+        if not player.is_ship_in_hand(ship_len):
+            print(genv.PlayerType.USER, genv.PlacementResult.LENGTH, ship_len)
+            return
+
+        field = player.field
+        hints = []
+        for key in sorted(field.legal_placements(ship_len)):
+            x, y = field.geometry.coords(key // 3)
+            hints.append(f'{geometry.ROTATIONS[key % 3]} {x + 1} '
+                         f'{utils.Utils.number_to_letters(y)}')
+        print(f'{len(hints)} placements: ' + ', '.join(hints))
+
     def fire_with_fire_turn(self, x, letters):
         y = utils.Utils.letters_to_number(letters)
         name1, player1 = self.env.get_active_player()
@@ -135,10 +182,7 @@ class Game:
         player2.active = True
         if self.mode == GameMode.HOT_SEAT:
             input('press Enter to clear screen...')
-            if sys.platform == 'win32':
-                os.system('cls')
-            else:
-                os.system('clear')
+            clear_screen()
         print(name + "'s move")
 
     def generate_tweet(self, enemy_name, player, action):
@@ -150,6 +194,43 @@ class Game:
                 f'missed: {player.missed_count}\n')
 
 
+def clear_screen():
+    render.clear_screen()
+    if painter is not None:
+        painter.reset()
+
+
+def print_field(field):
+    if painter is None:
+        print(field)
+    else:
+        sys.stdout.write(painter.paint(field))
+        sys.stdout.flush()
+
+
+def log_game(cur_game):
+    """Record the moves of the game to a new log in ``log_dir`` unless
+    they are recorded already"""
+    global game_log
+    if log_dir is None or cur_game.env.log is not None:
+        return
+    if game_log is not None:
+        game_log.close()
+    count = sum(1 for name in os.listdir(log_dir) if name.endswith('.log'))
+    game_log = movelog.MoveLog(os.path.join(log_dir, f'game{count}.log'))
+    game_log.start(cur_game.env)
+
+
+def print_replay(path, moves):
+    replay = movelog.Replay(movelog.MoveLog.open(path))
+    env = replay.state(len(replay) if moves is None else moves)
+    for name, player in env.players.items():
+        print(f'{name}:')
+        print(f'shots: {player.shots_count}')
+        print(f'missed: {player.missed_count}')
+        print(player.field)
+
+
 class CommandExecutor:
     def __init__(self):
         self.commands = {}
@@ -176,10 +257,7 @@ class BaseCommands:
     def clear(g, d):
         """
 clear - clears screen"""
-        if sys.platform == 'win32':
-            os.system('cls')
-        else:
-            os.system('clear')
+        clear_screen()
         return g
 
     @executor.command_decorator
@@ -194,8 +272,10 @@ exit - close the app"""
 auto - automatically generate user's field"""
         if len(cmd_data) != 1:
             print('Wrong command arguments amount')
+        elif not cur_game.env.generate_user_field():
+            print('Unable to generate field, place the rest of the fleet '
+                  'manually or start a new game')
         else:
-            cur_game.env.generate_user_field()
             print('Field was generated\r')
             if cur_game.mode == GameMode.HOT_SEAT:
                 print('player placed their fleet')
@@ -209,9 +289,9 @@ show [my | other] - show chosen field"""
         if len(cmd_data) != 2:
             print('Wrong command arguments amount')
         elif cmd_data[1] == 'my':
-            print(cur_game.env.get_active_player()[1].field)
+            print_field(cur_game.env.get_active_player()[1].field)
         elif cmd_data[1] == 'other':
-            print(cur_game.env.get_nonactive_player()[1].field)
+            print_field(cur_game.env.get_nonactive_player()[1].field)
         else:
             print('Wrong option')
         return cur_game
@@ -231,6 +311,19 @@ place [ship_len] [vl | vr | h] [d L] - place ship with *ship_len* length on
                                 int(cmd_data[3]) - 1, cmd_data[4].upper())
         return cur_game
 
+    @executor.command_decorator
+    def hints(cur_game, cmd_data):
+        """
+hints [ship_len] - list every legal placement of a ship with *ship_len*
+length as rotation and "d L" cell"""
+        if len(cmd_data) != 2:
+            print('Wrong command arguments amount')
+        elif not re.match(r'hints \d+$', ' '.join(cmd_data)):
+            print('Wrong ship length!')
+        else:
+            cur_game.show_hints(int(cmd_data[1]))
+        return cur_game
+
     @executor.command_decorator
     def fire(cur_game, pos):
         """
@@ -245,6 +338,38 @@ fire [d L] - shoot in "d L" cell"""
                 game.bot_fire()
         return cur_game
 
+    @executor.command_decorator
+    def save(cur_game, cmd_data):
+        """
+save [file] - save current game to *file*"""
+        if len(cmd_data) != 2:
+            print('Wrong command arguments amount')
+            return cur_game
+        try:
+            cur_game.save(cmd_data[1])
+        except OSError as e:
+            print(f'Unable to save game: {e}')
+        else:
+            print('Game was saved')
+        return cur_game
+
+    @executor.command_decorator
+    def load(cur_game, cmd_data):
+        """
+load [file] - continue game saved to *file*"""
+        if len(cmd_data) != 2:
+            print('Wrong command arguments amount')
+            return cur_game
+        try:
+            loaded = Game.load(cmd_data[1])
+        except (OSError, ValueError) as e:
+            print(f'Unable to load game: {e}')
+            return cur_game
+        print('Game was loaded')
+        name, _ = loaded.env.get_active_player()
+        print(name + "'s move")
+        return loaded
+
     @executor.command_decorator
     def new(g, d):
         """
@@ -253,7 +378,7 @@ All arguments are optional:
 side - side length
 ship_max - maximum ship length
 mode - game mode: hs or bot
-difficulty - difficulty 0 or 1 in bot mode
+difficulty - difficulty 0, 1 or 2 in bot mode
 If some of the arguments weren't given last ones will be used"""
         if len(d) > 5:
             print('More command arguments than expected')
@@ -279,9 +404,10 @@ If some of the arguments weren't given last ones will be used"""
             print('Wrong difficulty!')
             return g
         if mode != g.mode.value:
-            return Game(side, diff, ship_max, mode)
+            return Game(side, diff, ship_max, mode, seed=g.env.seed)
         players = list(g.env.players.keys())
-        return Game(side, diff, ship_max, mode, players[0], players[1])
+        return Game(side, diff, ship_max, mode, players[0], players[1],
+                    g.env.seed)
 
     @executor.command_decorator
     def help(g, d):
@@ -348,13 +474,64 @@ class CLI:
 
 
 if __name__ == '__main__':
-
-    game = Game()
+    parser = argparse.ArgumentParser(description='Battlebee game')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for fleet generation and bots, '
+                             'makes games reproducible')
+    parser.add_argument('--repaint', action='store_true',
+                        help='keep the shown field at the top of the '
+                             'terminal and redraw only changed cells')
+    subparsers = parser.add_subparsers(dest='command')
+    sim_parser = subparsers.add_parser(
+        'simulate', help='play bot-vs-bot games without any I/O')
+    sim_parser.add_argument('--games', type=int, default=1000)
+    sim_parser.add_argument('--side', type=int, default=6)
+    sim_parser.add_argument('--ship-max', type=int, default=4)
+    sim_parser.add_argument('--bots', default='0,1',
+                            help='difficulties of the two bots, e.g. 0,1')
+    sim_parser.add_argument('--workers', type=int, default=1,
+                            help='processes to shard games over, '
+                                 '0 for one per CPU')
+    replay_parser = subparsers.add_parser(
+        'replay', help='show the fields of a recorded game')
+    replay_parser.add_argument('log', help='move log file')
+    replay_parser.add_argument('--move', type=int, default=None,
+                               help='number of moves to replay, '
+                                    'all by default')
+    parser.add_argument('--log-dir', default=None,
+                        help='directory to record the moves of every '
+                             'game to')
+    parser.add_argument('--pool-size', type=int, default=4,
+                        help='fleets to generate ahead for games with the '
+                             'sizes played so far, 0 to generate on demand')
+    args = parser.parse_args()
+
+    if args.command == 'simulate':
+        bots = [int(d) for d in args.bots.split(',')]
+        if args.workers == 1:
+            print(simulation.simulate(args.games, args.side, args.ship_max,
+                                      bots, args.seed, args.log_dir))
+        else:
+            print(simulation.simulate_parallel(
+                args.games, args.side, args.ship_max, bots, args.seed,
+                args.workers or None, log_dir=args.log_dir))
+        sys.exit()
+    if args.command == 'replay':
+        print_replay(args.log, args.move)
+        sys.exit()
+
+    painter = render.TerminalPainter() if args.repaint else None
+    log_dir = args.log_dir
+    if args.pool_size > 0 and args.seed is None:
+        board_pool = boardpool.BoardPool(args.pool_size)
+        board_pool.reserve(6, 4)
+    game = Game(seed=args.seed)
     cmd_e = BaseCommands()
     command = ''
     sharing = tw_acces.Twitter()
 
     while True:
+        log_game(game)
         if game.finish:
             if game.mode == GameMode.HOT_SEAT:
                 winner = game.env.get_active_player()
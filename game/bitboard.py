@@ -0,0 +1,145 @@
+import functools
+import itertools
+from array import array
+
+import game.environment as genv
+import game.geometry as geometry
+
+
+class BitLayout:
+    """Bit positions of the cells of a hexagonal field with the given side.
+
+    Cell (x, y) is bit ``y * width + x``. ``width`` is one more than the
+    widest row, so the padding column keeps shifts along a row from
+    wrapping into the next one. Moving by ``ROTATION_SHIFTS[r]`` is a shift
+    by ``shifts[r]`` bits, ``field`` has the bits of all in-bound cells.
+    """
+
+    def __init__(self, side):
+        self.geometry = geometry.get_geometry(side)
+        geom = self.geometry
+        self.width = side * 2
+        self.shifts = tuple(dy * self.width + dx
+                            for (dx, dy) in geometry.ROTATION_SHIFTS)
+        self.bits = array('l', (y * self.width + x
+                                for (x, y) in zip(geom.xs, geom.ys)))
+        self.cell_at = array('l', [-1]) * (geom.height * self.width)
+        self.field = 0
+        for cell, bit in enumerate(self.bits):
+            self.cell_at[bit] = cell
+            self.field |= 1 << bit
+
+    def mask(self, cells):
+        """Mask with the bits of the given cell ids"""
+        result = 0
+        for cell in cells:
+            result |= 1 << self.bits[cell]
+        return result
+
+    def cells(self, mask):
+        """Cell ids of the set bits of ``mask``, in increasing order"""
+        return list(itertools.compress(self.cell_at,
+                                       map('1'.__eq__, bin(mask)[:1:-1])))
+
+    def spread(self, mask, length, rotation):
+        """Anchors of all ships of ``length`` laid along rotation index
+        ``rotation`` that cover a cell of ``mask``. Anchors of ships
+        leaving the field may be set as well."""
+        shift = self.shifts[rotation]
+        span = 1
+        while span * 2 <= length:
+            mask |= mask >> (span * shift)
+            span *= 2
+        if span < length:
+            mask |= mask >> ((length - span) * shift)
+        return mask
+
+    def dilate(self, mask):
+        """``mask`` with all hex neighbours of its cells"""
+        result = mask
+        for shift in self.shifts:
+            result |= (mask << shift) | (mask >> shift)
+        return result & self.field
+
+
+@functools.lru_cache(maxsize=32)
+def get_layout(side):
+    return BitLayout(side)
+
+
+class Bitboard:
+    """Honeycomb as four bit masks: cells with ships, hit ship cells,
+    missed cells and the halo around ships.
+
+    Queries work on the whole board at once, e.g. the anchors of all legal
+    placements of a ship along one rotation are a few shifts and ANDs of
+    the mask of free cells.
+    """
+
+    def __init__(self, side):
+        self.layout = get_layout(side)
+        self.ship = 0
+        self.hit = 0
+        self.miss = 0
+        self.halo = 0
+
+    @classmethod
+    def from_honeycomb(cls, board):
+        bitboard = cls(board.side)
+        layout = bitboard.layout
+        states = board.states
+        for cell, bit in enumerate(layout.bits):
+            state = states[cell]
+            if state == genv.MISSED:
+                bitboard.miss |= 1 << bit
+            elif state != genv.EMPTY:
+                bitboard.ship |= 1 << bit
+                if state != genv.SHIP:
+                    bitboard.hit |= 1 << bit
+        bitboard.halo = layout.dilate(bitboard.ship) & ~bitboard.ship
+        return bitboard
+
+    def place(self, cells):
+        mask = self.layout.mask(cells)
+        self.ship |= mask
+        self.halo = (self.halo | self.layout.dilate(mask)) & ~self.ship
+
+    def fire(self, cell):
+        bit = 1 << self.layout.bits[cell]
+        if self.ship & bit:
+            self.hit |= bit
+        else:
+            self.miss |= bit
+
+    def free(self):
+        """Cells a ship may cover: they and their neighbours are empty"""
+        return self.layout.field & ~self.layout.dilate(self.ship | self.miss)
+
+    def unknown(self):
+        """Cells not shot yet"""
+        return self.layout.field & ~(self.hit | self.miss)
+
+    def is_fleet_dead(self):
+        return not self.ship & ~self.hit
+
+    def placements(self, length, rotation, free=None):
+        """Anchors of all ships of ``length`` laid along rotation index
+        ``rotation`` over free cells only.
+
+        Runs of free cells are doubled by shift-and-AND, so this takes
+        about log2(length) whole-board operations."""
+        if free is None:
+            free = self.free()
+        shift = self.layout.shifts[rotation]
+        anchors = free
+        span = 1
+        while span * 2 <= length:
+            anchors &= anchors >> (span * shift)
+            span *= 2
+        if span < length:
+            anchors &= anchors >> ((length - span) * shift)
+        return anchors
+
+    def fits(self, anchor, rotation, length):
+        return bool(self.placements(length, rotation) >>
+                    self.layout.bits[anchor] & 1)
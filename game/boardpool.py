@@ -0,0 +1,111 @@
+"""Fleet layouts generated ahead of time.
+
+A layout is the tuple of ship cell tuples of a whole standard hand placed
+on an empty board. Boards whose environment has a ``pool`` take their
+``auto_generate`` layout from it, so starting a game costs a few
+placements however dense the fleet is.
+"""
+import collections
+import random
+import threading
+
+import game.environment as genv
+import game.geometry as geometry
+import game.placement as placement
+
+
+def generate_layout(side, ship_max, packing, rng):
+    """Layout of a full hand, None if the fleet does not fit"""
+    env = genv.Environment(side, 0, ship_max)
+    if sum(env.ship_cells) / geometry.get_geometry(side).square > 0.3:
+        return None
+    player = genv.Player(genv.PlayerType.USER, env)
+    layout = placement.FleetGenerator(player.field, rng, packing).generate(
+        player.hand)
+    return None if layout is None else tuple(map(tuple, layout))
+
+
+class BoardPool:
+    """Layouts keyed by ``(side, ship_max, packing)``.
+
+    A daemon thread keeps ``watermark`` layouts of every key asked for so
+    far, ``take`` pops one without waiting and only generates in place if
+    the pool has run dry. Keys whose fleet does not fit are remembered and
+    never generated again.
+    """
+
+    def __init__(self, watermark=8, seed=None):
+        self.watermark = watermark
+        self.random = random.Random(seed)
+        self.layouts = {}
+        self.impossible = set()
+        self.changed = threading.Condition()
+        self.thread = None
+        self.closed = False
+
+    def __len__(self):
+        with self.changed:
+            return sum(map(len, self.layouts.values()))
+
+    def reserve(self, side, ship_max, packing=1):
+        """Start filling the pool for games with these sizes"""
+        with self.changed:
+            self.want((side, ship_max, packing))
+            self.changed.notify_all()
+
+    def take(self, side, ship_max, packing=1):
+        """Layout for the sizes, None if the fleet does not fit"""
+        key = (side, ship_max, packing)
+        with self.changed:
+            layouts = self.want(key)
+            if layouts:
+                self.changed.notify_all()
+                return layouts.popleft()
+            if key in self.impossible:
+                return None
+            rng = random.Random(self.random.getrandbits(64))
+            self.changed.notify_all()
+        return generate_layout(side, ship_max, packing, rng)
+
+    def want(self, key):
+        if self.thread is None and not self.closed:
+            self.thread = threading.Thread(target=self.refill, daemon=True)
+            self.thread.start()
+        return self.layouts.setdefault(key, collections.deque())
+
+    def next_key(self):
+        for key, layouts in self.layouts.items():
+            if len(layouts) < self.watermark and key not in self.impossible:
+                return key
+        return None
+
+    def refill(self):
+        while True:
+            with self.changed:
+                key = self.next_key()
+                while key is None and not self.closed:
+                    self.changed.wait()
+                    key = self.next_key()
+                if self.closed:
+                    return
+                rng = random.Random(self.random.getrandbits(64))
+            layout = generate_layout(*key, rng)
+            with self.changed:
+                if layout is None:
+                    self.impossible.add(key)
+                else:
+                    self.layouts[key].append(layout)
+                self.changed.notify_all()
+
+    def wait_full(self, timeout=None):
+        """Wait until every key asked for is at the watermark"""
+        with self.changed:
+            return self.changed.wait_for(lambda: self.next_key() is None,
+                                         timeout)
+
+    def close(self):
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+        if self.thread is not None:
+            self.thread.join()
@@ -1,8 +1,14 @@
+import collections
 import enum
+import heapq
+from array import array
 import random
-import time
 import sys
 
+import game.bitboard as bitboard
+import game.geometry as geometry
+import game.placement as placement
+import game.render as render
 import game.utils as utils
 
 if sys.platform == 'win32':
@@ -79,8 +85,112 @@ class Cell:
         return (self.x, self.y) != (other.x, other.y)
 
 
+STATES = tuple(CellState)
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+COLORS = tuple(Color)
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+
+EMPTY = STATE_CODES[CellState.EMPTY]
+FIRED = STATE_CODES[CellState.FIRED]
+DEAD = STATE_CODES[CellState.DEAD]
+SHIP = STATE_CODES[CellState.SHIP]
+MISSED = STATE_CODES[CellState.MISSED]
+RED = COLOR_CODES[Color.RED]
+
+
+class CellView(Cell):
+    """Cell of a Honeycomb backed by the board's state and color arrays"""
+
+    def __init__(self, board, cell_id):
+        self.board = board
+        self.id = cell_id
+
+    @property
+    def x(self):
+        return self.board.geometry.xs[self.id]
+
+    @property
+    def y(self):
+        return self.board.geometry.ys[self.id]
+
+    @property
+    def state(self):
+        return STATES[self.board.states[self.id]]
+
+    @state.setter
+    def state(self, state):
+        self.board.states[self.id] = STATE_CODES[state]
+        self.board.changes.append(self.id)
+        self.board.legal.clear()
+
+    @property
+    def color(self):
+        return COLORS[self.board.colors[self.id]]
+
+    @color.setter
+    def color(self, color):
+        self.board.colors[self.id] = COLOR_CODES[color]
+        self.board.changes.append(self.id)
+
+    def __eq__(self, other):
+        return (self.x, self.y) == (other.x, other.y)
+
+
+class FieldRow:
+    """Row ``y`` of a Honeycomb indexed by ``x``, padding included"""
+
+    def __init__(self, board, y):
+        self.board = board
+        self.y = y
+
+    def __len__(self):
+        return self.board.geometry.row_end[self.y]
+
+    def __getitem__(self, x):
+        if not 0 <= x < len(self):
+            raise IndexError('cell index out of range')
+        return self.board.cell(x, self.y)
+
+    def __iter__(self):
+        return (self.board.cell(x, self.y) for x in range(len(self)))
+
+
+class FieldView:
+    """List-of-rows facade over a Honeycomb, cells are built lazily"""
+
+    def __init__(self, board):
+        self.board = board
+
+    def __len__(self):
+        return self.board.geometry.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < len(self):
+            raise IndexError('row index out of range')
+        return FieldRow(self.board, y)
+
+    def __iter__(self):
+        return (FieldRow(self.board, y) for y in range(len(self)))
+
+
+class Ship:
+    """Ship placed on a Honeycomb: its cell ids, the cells around it and
+    the number of cells not hit yet"""
+
+    def __init__(self, cells, halo):
+        self.cells = cells
+        self.halo = halo
+        self.alive = len(cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def is_dead(self):
+        return self.alive == 0
+
+
 class Player:
-    def __init__(self, typ, env):
+    def __init__(self, typ, env, generate=True):
         self.type = typ
         self.active = False
         self.field = Honeycomb(env.side, self, env)
@@ -98,7 +208,9 @@ class Player:
             if self.AI.diff != env.diff:
                 env.diff = self.AI.diff
             self.bot = self.AI.bot(self)
-            self.bot.generator(env)
+            if generate and not self.bot.generator(env):
+                raise ValueError(f"bot fleet doesn't fit into field with "
+                                 f"side {env.side}")
 
     def is_ship_in_hand(self, ship_len):
         for ship in self.hand:
@@ -125,11 +237,15 @@ class Player:
 
 class Environment:
 
-    def __init__(self, side, diff, ship_max):
+    def __init__(self, side, diff, ship_max, seed=None):
         self.ship_max = ship_max
         self.diff = diff
         self.side = side
+        self.seed = seed
+        self.random = random.Random(seed)
         self.players = {}
+        self.log = None
+        self.pool = None
         self.ship_cells = [ship_max - x for x in
                            range(ship_max) for _ in range(x + 1)]
 
@@ -145,15 +261,14 @@ class Environment:
             raise KeyError
 
     def reset_player_data(self, player):
-        player.field = Honeycomb(self.side, player.type, self)
+        player.field = Honeycomb(self.side, player, self)
         player.hand = [self.ship_max - x for x in range(self.ship_max)
                        for _ in range(x + 1)]
         player.fleet = 0
 
     def generate_user_field(self):
         _, player = self.get_active_player()
-        while not player.field.auto_generate():
-            self.reset_player_data(player)
+        return player.field.auto_generate()
 
     def get_active_player(self):
         for n, p in self.players.items():
@@ -173,265 +288,248 @@ class Environment:
 class Honeycomb:
     def __init__(self, side, player, env):
         self.side = side
-        self.field = []
+        self.geometry = geometry.get_geometry(side)
         self.owner = player
-        self.poses = []
-        self.square = 0
+        self.square = self.geometry.square
+        self.states = bytearray([STATE_CODES[CellState.EMPTY]]) * self.square
+        self.colors = bytearray([COLOR_CODES[Color.GREEN]]) * self.square
+        self.field = FieldView(self)
+        self.ships = []
+        self.ship_at = array('i', [-1]) * self.square
+        self.unshot = utils.IndexedSet.from_unique(range(self.square))
+        self.changes = []
+        self.renderer = None
+        self.legal = {}
         self.corner_ships_count = 0
         self.env = env
-        self.corners = ((0, 0),
-                        (0, side - 1),
-                        (side - 1, 0),
-                        (side * 2 - 1, side - 1),
-                        (side - 1, side * 2 - 1),
-                        (side * 2 - 1, side * 2 - 1))
-
-        side_count = 0
-        count = 0
-        for y in range(side * 2 - 1):
-            self.field.append([])
-            for x in range(side + side_count):
-                if y >= self.side - 1 and x < count:
-                    self.field[y].append(Cell(x, y, CellState.NOT_FIELD))
-                else:
-                    self.poses.append((x, y))
-                    self.field[y].append(Cell(x, y))
-                    self.square += 1
-            if y < self.side - 1:
-                side_count += 1
-            else:
-                count += 1
 
     def __str__(self):
-        side_count = 0
-        count = 0
-        spaces_count = self.side * 2 - side_count
-        result = [' ' * (spaces_count + 1) + '     ']
-
-        for x in range(self.side):
-            result.append(Color.BLUE.value + str(x + 1) + Color.DEFAULT.value +
-                          '   ')
-        result.append('\n')
-
-        for y in range(self.side * 2 - 1):
-            letters = utils.Utils.number_to_letters(y)
-            result.append(' ' * (spaces_count - len(letters) + 1))
-            result.append(Color.PURPLE.value + letters + Color.DEFAULT.value +
-                          '   ')
-            for x in range(count, len(self.field[y])):
-                if (self.field[y][x].state == CellState.SHIP and
-                        not self.owner.active):
-                    result.append(self.field[y][x].color.value +
-                                  CellState.EMPTY.value + Color.DEFAULT.value)
-                elif (self.field[y][x].color == Color.GREEN and
-                      self.owner.active and self.owner.is_fleet_placed()):
-                    result.append(self.field[y][x].state.value)
-                else:
-                    result.append(self.field[y][x].color.value +
-                                  self.field[y][x].state.value +
-                                  Color.DEFAULT.value)
-                result.append('   ')
-
-            if y < self.side - 1:
-                result.append(Color.BLUE.value +
-                              str(len(self.field[y]) - count + 1) +
-                              Color.DEFAULT.value)
-                side_count += 1
-                spaces_count -= 2
-            else:
-                count += 1
-                spaces_count += 2
-            result.append('\n')
-
-        return ''.join(result)
+        if self.renderer is None:
+            self.renderer = render.BoardRenderer(self)
+        return self.renderer.render()
 
     def is_in_bound(self, x, y):
-        if not 0 <= y < (self.side * 2 - 1):
+        return self.geometry.is_in_bound(x, y)
+
+    def cell(self, x, y):
+        """Cell-like view of (x, y), created on demand"""
+        if self.is_in_bound(x, y):
+            return CellView(self, self.geometry.index(x, y))
+        return Cell(x, y, CellState.NOT_FIELD)
+
+    def is_cell_free(self, cell):
+        """Whether a ship may cover the cell: it and its neighbours are
+        empty"""
+        if self.states[cell] != EMPTY:
             return False
+        for near in self.geometry.neighbours[cell]:
+            if self.states[near] != EMPTY:
+                return False
+        return True
 
-        for cell in self.field[y]:
-            if cell.state != CellState.NOT_FIELD:
-                index = self.field[y].index(cell)
-                break
-        return index <= x < len(self.field[y])
+    def get_state(self, x, y):
+        if not self.is_in_bound(x, y):
+            return CellState.NOT_FIELD
+        return STATES[self.states[self.geometry.index(x, y)]]
 
     def fire_cell(self, x, y, player):
         if not self.is_in_bound(x, y):
             return FireResult.UNABLE
-        if self.field[y][x].state == CellState.SHIP:
-            self.field[y][x].state = CellState.FIRED
+        cell = self.geometry.index(x, y)
+        if self.states[cell] == SHIP:
+            self.states[cell] = FIRED
+            self.unshot.discard(cell)
             player.shots_count += 1
-            self.field[y][x].color = Color.RED
+            self.colors[cell] = RED
+            self.changes.append(cell)
             self.owner.delete_cell_from_fleet()
-            if self.is_ship_dead(x, y, x, y):
-                self.change_color_death(x, y, x, y)
-                return FireResult.DESTROYED
+            ship = self.ships[self.ship_at[cell]]
+            ship.alive -= 1
+            if ship.is_dead():
+                self.sink_ship(ship)
+                result = FireResult.DESTROYED
             else:
-                self.change_color_hit(x, y, Color.GREEN)
-                return FireResult.HIT
-        elif self.field[y][x].state == CellState.EMPTY:
-            self.field[y][x].state = CellState.MISSED
-            self.field[y][x].color = Color.AQUA
+                self.change_color_hit(cell, Color.GREEN)
+                result = FireResult.HIT
+        elif self.states[cell] == EMPTY:
+            self.states[cell] = MISSED
+            self.legal.clear()
+            self.unshot.discard(cell)
+            self.colors[cell] = COLOR_CODES[Color.AQUA]
+            self.changes.append(cell)
             player.shots_count += 1
             player.missed_count += 1
-            return FireResult.MISSED
+            result = FireResult.MISSED
         else:
             return FireResult.UNABLE
+        if self.env.log is not None:
+            self.env.log.shot(self, player, cell)
+        return result
 
-    def change_color_hit(self, x, y, color):
-        ship_limits = utils.Utils.get_ship_borders(x, y)
-        borders = ((ship_limits['floor_y'], ship_limits['ceil_x'] - 1),
-                   (ship_limits['ceil_y'] - 1, ship_limits['floor_x']))
-
-        for i in range(ship_limits['floor_y'], ship_limits['ceil_y']):
-            for j in range(ship_limits['floor_x'], ship_limits['ceil_x']):
-                if (i, j) in borders or not self.is_in_bound(j, i):
-                    continue
-                if (self.field[i][j].state != CellState.MISSED and
-                        self.field[i][j].color != Color.RED):
-                    self.field[i][j].color = color
-
-    def change_color_death(self, x, y, prev_x, prev_y):
-        ship_limits = utils.Utils.get_ship_borders(x, y)
-        borders = ((ship_limits['floor_y'], ship_limits['ceil_x'] - 1),
-                   (ship_limits['ceil_y'] - 1, ship_limits['floor_x']))
-
-        for i in range(ship_limits['floor_y'], ship_limits['ceil_y']):
-            for j in range(ship_limits['floor_x'], ship_limits['ceil_x']):
-                if (i, j) in borders or not self.is_in_bound(j, i):
-                    continue
-                if self.field[i][j].state == CellState.DEAD:
-                    if not (self.field[i][j] in (
-                            self.field[y][x], self.field[prev_y][prev_x])):
-                        self.change_color_death(j, i, x, y)
-                elif (self.field[y][x].state == CellState.DEAD and
-                      self.field[i][j].state != CellState.MISSED):
-                    self.field[i][j].color = Color.RED
-        return True
-
-    def is_ship_dead(self, x, y, prev_x, prev_y):
-        ship_limits = utils.Utils.get_ship_borders(x, y)
-        borders = ((ship_limits['floor_y'], ship_limits['ceil_x']),
-                   (ship_limits['ceil_y'], ship_limits['floor_x']))
-
-        for i in range(ship_limits['floor_y'], ship_limits['ceil_y']):
-            for j in range(ship_limits['floor_x'], ship_limits['ceil_x']):
-                if (i, j) in borders or not self.is_in_bound(j, i):
-                    continue
-                if self.field[i][j].state == CellState.FIRED:
-                    if (self.field[i][j] != self.field[y][x] and
-                            self.field[i][j] != self.field[prev_y][prev_x]):
-                        if self.is_ship_dead(j, i, x, y):
-                            continue
-                        else:
-                            return False
-                elif self.field[i][j].state == CellState.SHIP:
-                    return False
-        self.field[y][x].state = CellState.DEAD
-        self.field[y][x].color = Color.RED
-        return True
+    def change_color_hit(self, cell, color):
+        color = COLOR_CODES[color]
+        for near in (cell,) + self.geometry.neighbours[cell]:
+            if self.states[near] != MISSED and self.colors[near] != RED:
+                self.colors[near] = color
+                self.changes.append(near)
+
+    def sink_ship(self, ship):
+        for cell in ship.cells:
+            self.states[cell] = DEAD
+            self.colors[cell] = RED
+        for cell in ship.halo:
+            if self.states[cell] != MISSED:
+                self.colors[cell] = RED
+        self.changes.extend(ship.cells + ship.halo)
+
+    def is_ship_dead(self, x, y):
+        ship = self.ship_at[self.geometry.index(x, y)]
+        return ship != -1 and self.ships[ship].is_dead()
 
     def clear_colors(self):
-        for row in self.field:
-            for cell in row:
-                cell.color = Color.DEFAULT
+        self.colors[:] = bytes([COLOR_CODES[Color.DEFAULT]]) * self.square
+        self.changes.append(-1)
+
+    def corners_left(self):
+        """How many more corner cells ships may take"""
+        return 0.1 * self.env.ships_count - self.corner_ships_count
+
+    def corner_cells(self, cells):
+        return sum(1 for cell in cells if cell in self.geometry.corners)
+
+    def placement_key(self, cells):
+        """Key ``anchor * 3 + rotation`` of the straight ship covering
+        cell ids ``cells`` or None"""
+        cells = sorted(cells)
+        for rotation in range(3):
+            if self.geometry.ship_cells(cells[0], rotation,
+                                        len(cells)) == cells:
+                return cells[0] * 3 + rotation
+        return None
+
+    def legal_masks(self, length):
+        """Per rotation, the bit mask of anchors of legal placements of a
+        ship of ``length``.
+
+        The masks are built on first request for the length and then kept
+        up to date as ships are placed, any other change of cell states
+        drops them."""
+        masks = self.legal.get(length)
+        if masks is None:
+            bits = bitboard.Bitboard.from_honeycomb(self)
+            free = bits.free()
+            masks = [bits.placements(length, rotation, free)
+                     for rotation in range(3)]
+            self.legal[length] = masks
+            self.drop_corner_placements(length, masks)
+        return masks
+
+    def legal_placements(self, length):
+        """Set of keys ``anchor * 3 + rotation`` of every placement of a
+        ship of ``length`` that ``place_ship_on_field`` accepts"""
+        layout = bitboard.get_layout(self.side)
+        return {cell * 3 + rotation
+                for rotation, mask in enumerate(self.legal_masks(length))
+                for cell in layout.cells(mask)}
+
+    def is_legal_placement(self, key, length):
+        layout = bitboard.get_layout(self.side)
+        return bool(self.legal_masks(length)[key % 3] >>
+                    layout.bits[key // 3] & 1)
+
+    def drop_corner_placements(self, length, masks):
+        """Drop placements taking more corner cells than left"""
+        geom = self.geometry
+        layout = bitboard.get_layout(self.side)
+        corners_left = self.corners_left()
+        for corner in geom.corners:
+            for rotation, backstep in enumerate(geom.backsteps):
+                anchor = corner
+                for _ in range(length):
+                    if anchor == -1:
+                        break
+                    bit = layout.bits[anchor]
+                    if (masks[rotation] >> bit & 1 and
+                            self.corner_cells(geom.ship_cells(
+                                anchor, rotation, length)) > corners_left):
+                        masks[rotation] &= ~(1 << bit)
+                    anchor = backstep[anchor]
+
+    def update_placements(self, area, corners_taken):
+        """Drop cached placements crossing cell ids ``area`` and, once the
+        placed ship took corner cells, those taking too many corners"""
+        layout = bitboard.get_layout(self.side)
+        area = layout.mask(area)
+        for length, masks in self.legal.items():
+            for rotation in range(3):
+                masks[rotation] &= ~layout.spread(area, length, rotation)
+            if corners_taken:
+                self.drop_corner_placements(length, masks)
+
+    def ship_halo(self, cells):
+        """Cell ids around a ship covering cell ids ``cells``"""
+        halo = dict.fromkeys(near for cell in cells
+                             for near in self.geometry.neighbours[cell])
+        for cell in cells:
+            halo.pop(cell, None)
+        return tuple(halo)
 
     def place_ship_on_field(self, cells_to_take):
-        taken_cells = []
+        geom = self.geometry
         ship_len = len(cells_to_take)
         if not self.owner.is_ship_in_hand(ship_len):
             return PlacementResult.LENGTH
-        for (x, y) in cells_to_take:
-            if (x, y) in self.corners:
-                if self.corner_ships_count + 1 > 0.1 * self.env.ships_count:
-                    return PlacementResult.UNABLE
-                self.corner_ships_count += 1
-            if not self.is_in_bound(x, y):
-                return PlacementResult.UNABLE
-
-            ceil_y = min(y + 2, self.side * 2 - 1)
-            floor_y = max(y - 1, 0)
-            ceil_x = min(x + 2, len(self.field[y]))
-            floor_x = max(x - 1, 0)
-            borders = ((ceil_x, floor_y), (floor_x, ceil_y))
-            for i in range(floor_x, ceil_x):
-                for j in range(floor_y, ceil_y):
-                    if (i, j) in borders or not self.is_in_bound(i, j):
-                        continue
-                    if ((self.field[j][i].state != CellState.EMPTY) and
-                            self.field[j][i] not in taken_cells):
-                        return PlacementResult.UNABLE
-            taken_cells.append(self.field[y][x])
+        if not all(self.is_in_bound(x, y) for (x, y) in cells_to_take):
+            return PlacementResult.UNABLE
+        taken_cells = [geom.index(x, y) for (x, y) in cells_to_take]
+        key = self.placement_key(taken_cells)
+        if key is None or not self.is_legal_placement(key, ship_len):
+            return PlacementResult.UNABLE
+
+        corners_taken = self.corner_cells(taken_cells)
+        self.corner_ships_count += corners_taken
         for cell in taken_cells:
-            self.change_color_hit(cell.x, cell.y, Color.RED)
-            cell.state = CellState.SHIP
+            self.change_color_hit(cell, Color.RED)
+            self.states[cell] = SHIP
+            self.changes.append(cell)
+            self.ship_at[cell] = len(self.ships)
+        ship = Ship(tuple(taken_cells), self.ship_halo(taken_cells))
+        self.ships.append(ship)
+        self.update_placements(taken_cells + list(ship.halo), corners_taken)
         self.owner.move_ship_to_fleet(ship_len)
-        for pos in cells_to_take:
-            self.poses.remove(pos)
         if not self.owner.hand:
             self.clear_colors()
+        if self.env.log is not None:
+            self.env.log.placement(self, key, ship_len)
         return PlacementResult.SUCCESS
 
-    def auto_generate(self):
-        hand = self.owner.hand
-        random.seed()
-        start_time = time.process_time()
-        while hand:
-            ship_len = hand[0]
-            res = ''
-            while res != PlacementResult.SUCCESS:
-                rotation = random.choice(('vl', 'vr', 'h'))
-                (x, y) = random.choice(self.poses)
-                if rotation == 'vl':
-                    cells_to_take = [(x, y + i) for i in range(ship_len)]
-                elif rotation == 'vr':
-                    cells_to_take = [(x + i, y + i) for i in range(ship_len)]
-                else:
-                    cells_to_take = [(x + i, y) for i in range(ship_len)]
-                res = self.place_ship_on_field(cells_to_take)
-
-                check_time = time.process_time()
-                if check_time - start_time > 0.5:
-                    return False
+    def auto_generate(self, rng=None, packing=1):
+        """Place the rest of the owner's hand, returns False and leaves the
+        board untouched if it does not fit.
+
+        ``rng`` defaults to the environment's random generator, or to the
+        environment's board pool for an empty board. ``packing`` > 1
+        biases every ship towards the top rows by taking the lowest of that
+        many candidate placements."""
+        if rng is None and self.env.pool is not None and not self.ships:
+            layout = self.env.pool.take(self.side, self.env.ship_max,
+                                        packing)
+        else:
+            layout = placement.FleetGenerator(
+                self, rng or self.env.random, packing).generate(
+                    self.owner.hand)
+        if layout is None:
+            return False
+        for cells in layout:
+            res = self.place_ship_on_field([self.geometry.coords(cell)
+                                            for cell in cells])
+            if res != PlacementResult.SUCCESS:
+                raise RuntimeError(f'generated ship {cells} was rejected: '
+                                   f'{res}')
         return True
 
-    def partition_auto_generate(self):
-        hand = self.owner.hand
-        random.seed()
-        start_time = time.process_time()
-        y_border = hand[0]
-        x_border = 0
-        while hand:
-            ship_len = hand[0]
-            x_border += ship_len
-            if x_border > len(self.field[y_border]):
-                x_border = ship_len
-                if y_border + ship_len < self.side * 2 - 1:
-                    y_border += ship_len
-                else:
-                    y_border = self.side * 2 - 1
-            res = ''
-            while res != PlacementResult.SUCCESS:
-                rotation = random.choice(('vl', 'vr', 'h'))
-                y = random.randrange(min(y_border, self.side * 2 - 1))
-                x = random.randrange(min(x_border, len(self.field[y])))
-                if rotation == 'vl':
-                    cells_to_take = [(x, y + i) for i in range(ship_len)]
-                elif rotation == 'vr':
-                    cells_to_take = [(x + i, y + i) for i in range(ship_len)]
-                else:
-                    cells_to_take = [(x + i, y) for i in range(ship_len)]
-                res = self.place_ship_on_field(cells_to_take)
-
-                check_time = time.process_time()
-                if check_time - start_time > 0.1:
-                    return False
-
-            if len(hand) == 1:
-                self.auto_generate()
-                break
-
-        return True
+    def partition_auto_generate(self, rng=None):
+        return self.auto_generate(rng, packing=8)
 
 
 class BotAI:
@@ -443,6 +541,9 @@ class BotAI:
             self.bot = BotAI.__subclasses__()[0]
             self.diff = 0
 
+    def resume(self, env):
+        """Pick up a game restored from a snapshot"""
+
 
 class SimpleBotAI(BotAI):
     def __init__(self, bot):
@@ -450,54 +551,234 @@ class SimpleBotAI(BotAI):
         self.bot = bot
 
     def generator(self, env):
-        print('Bot field is being generated')
-        while not self.field.auto_generate():
-            env.reset_player_data(self.bot)
-        print('Field was generated successfully')
+        return self.bot.field.auto_generate()
 
     def fire(self, env):
         _, enemy = env.get_nonactive_player()
-
-        y = random.randrange(self.bot.field.side * 2 - 1)
-        x = random.randrange(len(enemy.field.field[y]))
-        result = enemy.field.fire_cell(x, y, self.bot)
-        return result
+        (x, y) = enemy.field.geometry.coords(
+            enemy.field.unshot.choice(env.random))
+        return enemy.field.fire_cell(x, y, self.bot)
 
 
 class HardBotAI(BotAI):
+    """Shoots at random until it hits, then hunts the damaged ship.
+
+    ``frontier`` queues the unshot cells the ship may continue to: the
+    neighbours of the first hit, and once two hits line up along one of
+    the three hex axes only the two cells extending that line.
+    """
+
     def __init__(self, bot):
         self.field = bot.field
         self.bot = bot
-        self.last_fire = (-1, -1)
+        self.hits = []
+        self.frontier = collections.deque()
 
     def generator(self, env):
-        print('Bot field is being generated')
-        while not self.field.partition_auto_generate(self.bot):
-            env.reset_player_data(self.bot)
-        print('Field was generated successfully')
+        return self.bot.field.partition_auto_generate()
+
+    def resume(self, env):
+        """Hunt the ship hit on the enemy board but not sunk yet"""
+        board = next(player.field for player in env.players.values()
+                     if player is not self.bot)
+        self.hits = [cell for cell in range(board.square)
+                     if board.states[cell] == FIRED]
+        self.frontier.clear()
+        if self.hits:
+            self.update_frontier(board, env.random)
+
+    def update_frontier(self, board, rng):
+        geom = board.geometry
+        self.frontier.clear()
+        if len(self.hits) == 1:
+            near = list(geom.neighbours[self.hits[0]])
+            rng.shuffle(near)
+            self.frontier.extend(near)
+            return
+        hits = set(self.hits)
+        first = self.hits[0]
+        for rotation in range(3):
+            if (geom.steps[rotation][first] in hits or
+                    geom.backsteps[rotation][first] in hits):
+                break
+        while geom.backsteps[rotation][first] in hits:
+            first = geom.backsteps[rotation][first]
+        last = first
+        while geom.steps[rotation][last] in hits:
+            last = geom.steps[rotation][last]
+        self.frontier.extend(cell for cell in (geom.backsteps[rotation][first],
+                                               geom.steps[rotation][last])
+                             if cell != -1)
 
     def fire(self, env):
         _, enemy = env.get_nonactive_player()
-        if self.last_fire == (-1, -1):
-            y = random.randrange(enemy.field.side * 2 - 1)
-            x = random.randrange(len(enemy.field.field[y]))
-            result = enemy.field.fire_cell(x, y, self.bot)
+        board = enemy.field
+        while self.frontier and self.frontier[0] not in board.unshot:
+            self.frontier.popleft()
+        if self.frontier:
+            cell = self.frontier.popleft()
         else:
-            (prev_y, prev_x) = self.last_fire
-            ceil_y = prev_y + 2
-            floor_y = prev_y - 1
-            ceil_x = prev_x + 2
-            floor_x = prev_x - 1
-            while True:
-                y = random.randrange(floor_y, ceil_y)
-                x = random.randrange(floor_x, ceil_x)
-                if ((y, x) != (floor_y, ceil_x - 1) or
-                        (y, x) != (ceil_y - 1, floor_x) or
-                        self.field.is_in_bound(y, x)):
-                    break
-            result = enemy.field.fire_cell(x, y, self.bot)
+            self.hits = []
+            cell = board.unshot.choice(env.random)
+        result = board.fire_cell(*board.geometry.coords(cell), self.bot)
         if result == FireResult.DESTROYED:
-            self.last_fire = (-1, -1)
+            self.hits = []
+            self.frontier.clear()
+        elif result == FireResult.HIT:
+            self.hits.append(cell)
+            self.update_frontier(board, env.random)
+        return result
+
+
+class DensityBotAI(BotAI):
+    """Fires at the unshot cell covered by the most placements of the
+    ships still afloat.
+
+    ``coverage[length][cell]`` counts the placements of that length
+    covering the cell which avoid every cell known to be empty. Shots only
+    ever remove placements, so densities never grow and a lazy max-heap
+    yields the best cell without rescanning the board.
+    """
+
+    def __init__(self, bot):
+        self.field = bot.field
+        self.bot = bot
+        self.enemy = None
+
+    def generator(self, env):
+        return self.bot.field.auto_generate()
+
+    def observe(self, env):
+        """Build the placement counts from what is visible on the enemy
+        board"""
+        _, enemy = env.get_nonactive_player()
+        board = self.enemy = enemy.field
+        geom = self.geometry = board.geometry
+        self.remaining = collections.Counter(env.ship_cells)
+        self.known = bytearray(geom.square)
+        self.live_hits = set()
+        for ship in board.ships:
+            if ship.is_dead():
+                self.remaining[len(ship)] -= 1
+                for cell in ship.halo:
+                    self.known[cell] = 1
+        for cell in range(geom.square):
+            if board.states[cell] in (MISSED, DEAD):
+                self.known[cell] = 1
+            elif board.states[cell] == FIRED:
+                self.live_hits.add(cell)
+
+        self.legal = {}
+        self.coverage = {}
+        self.density = [0] * geom.square
+        runs = []
+        for step in geom.steps:
+            run = [0] * geom.square
+            for cell in range(geom.square - 1, -1, -1):
+                if not self.known[cell]:
+                    run[cell] = 1 if step[cell] == -1 else run[step[cell]] + 1
+            runs.append(run)
+        lines = [[] for _ in geom.steps]
+        for rotation, step in enumerate(geom.steps):
+            for start in range(geom.square):
+                if geom.backsteps[rotation][start] != -1:
+                    continue
+                line = [start]
+                while step[line[-1]] != -1:
+                    line.append(step[line[-1]])
+                lines[rotation].append(line)
+
+        for length, count in self.remaining.items():
+            if count <= 0:
+                continue
+            legal = bytearray(geom.square * 3)
+            coverage = [0] * geom.square
+            for rotation in range(3):
+                run = runs[rotation]
+                for line in lines[rotation]:
+                    window = 0
+                    for i, cell in enumerate(line):
+                        if run[cell] >= length:
+                            legal[cell * 3 + rotation] = 1
+                            window += 1
+                        if i >= length and run[line[i - length]] >= length:
+                            window -= 1
+                        coverage[cell] += window
+            self.legal[length] = legal
+            self.coverage[length] = coverage
+            for cell in range(geom.square):
+                self.density[cell] += count * coverage[cell]
+
+        self.heap = [(-self.density[cell], env.random.random(), cell)
+                     for cell in range(geom.square) if self.is_unshot(cell)]
+        heapq.heapify(self.heap)
+
+    def is_unshot(self, cell):
+        return cell in self.enemy.unshot
+
+    def block(self, cell):
+        """Drop the placements crossing a cell known to be empty"""
+        if self.known[cell]:
+            return
+        self.known[cell] = 1
+        geom = self.geometry
+        for length, legal in self.legal.items():
+            count = self.remaining[length]
+            coverage = self.coverage[length]
+            for rotation in range(3):
+                backstep = geom.backsteps[rotation]
+                anchor = cell
+                for _ in range(length):
+                    if anchor == -1:
+                        break
+                    key = anchor * 3 + rotation
+                    if legal[key]:
+                        legal[key] = 0
+                        for covered in geom.ship_cells(anchor, rotation,
+                                                       length):
+                            coverage[covered] -= 1
+                            self.density[covered] -= count
+                    anchor = backstep[anchor]
+
+    def sink(self, ship):
+        length = len(ship)
+        coverage = self.coverage[length]
+        for cell in range(self.geometry.square):
+            self.density[cell] -= coverage[cell]
+        self.remaining[length] -= 1
+        if self.remaining[length] == 0:
+            del self.legal[length]
+            del self.coverage[length]
+        self.live_hits.difference_update(ship.cells)
+        for cell in ship.cells + ship.halo:
+            self.block(cell)
+
+    def target(self):
+        if self.live_hits:
+            near = {cell for hit in self.live_hits
+                    for cell in self.geometry.neighbours[hit]
+                    if self.is_unshot(cell)}
+            if near:
+                return max(near, key=self.density.__getitem__)
+        while True:
+            density, tie, cell = self.heap[0]
+            if not self.is_unshot(cell):
+                heapq.heappop(self.heap)
+            elif -density != self.density[cell]:
+                heapq.heapreplace(self.heap, (-self.density[cell], tie, cell))
+            else:
+                return cell
+
+    def fire(self, env):
+        if self.enemy is None:
+            self.observe(env)
+        cell = self.target()
+        (x, y) = self.geometry.coords(cell)
+        result = self.enemy.fire_cell(x, y, self.bot)
+        if result == FireResult.MISSED:
+            self.block(cell)
         elif result == FireResult.HIT:
-            self.last_fire = (y, x)
+            self.live_hits.add(cell)
+        elif result == FireResult.DESTROYED:
+            self.sink(self.enemy.ships[self.enemy.ship_at[cell]])
         return result
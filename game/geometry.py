@@ -0,0 +1,98 @@
+import functools
+from array import array
+
+NEIGHBOUR_SHIFTS = ((-1, -1), (0, -1), (-1, 0), (1, 0), (0, 1), (1, 1))
+ROTATIONS = ('h', 'vl', 'vr')
+ROTATION_SHIFTS = ((1, 0), (0, 1), (1, 1))
+
+
+class HexGeometry:
+    """Static layout of a hexagonal field with the given side.
+
+    Row ``y`` of the field spans ``x`` in ``[row_first[y], row_end[y])``,
+    everything left of ``row_first[y]`` is ``NOT_FIELD`` padding. Real cells
+    are numbered row by row, so any per-cell data of a board fits into a
+    flat array indexed by cell id. ``neighbours[cell]`` lists the in-bound
+    hex neighbours of a cell, ``steps[r][cell]`` and ``backsteps[r][cell]``
+    are the next and previous cells along rotation ``ROTATIONS[r]`` or -1.
+
+    Instances are immutable, use ``get_geometry`` to share them between
+    boards of the same side.
+    """
+
+    def __init__(self, side):
+        self.side = side
+        self.height = side * 2 - 1
+        self.row_first = array('l')
+        self.row_end = array('l')
+        self.row_start = array('l')
+        self.xs = array('l')
+        self.ys = array('l')
+
+        square = 0
+        for y in range(self.height):
+            first = max(0, y - side + 1)
+            end = side + min(y, side - 1)
+            self.row_first.append(first)
+            self.row_end.append(end)
+            self.row_start.append(square)
+            for x in range(first, end):
+                self.xs.append(x)
+                self.ys.append(y)
+            square += end - first
+        self.square = square
+
+        last = side * 2 - 2
+        self.corners = frozenset(
+            self.index(x, y) for (x, y) in ((0, 0),
+                                            (side - 1, 0),
+                                            (0, side - 1),
+                                            (last, side - 1),
+                                            (side - 1, last),
+                                            (last, last)))
+
+        self.neighbours = tuple(
+            tuple(self.index(x + dx, y + dy)
+                  for (dx, dy) in NEIGHBOUR_SHIFTS
+                  if self.is_in_bound(x + dx, y + dy))
+            for (x, y) in zip(self.xs, self.ys))
+
+        self.steps = tuple(
+            array('l', (self.index(x + dx, y + dy)
+                        if self.is_in_bound(x + dx, y + dy) else -1
+                        for (x, y) in zip(self.xs, self.ys)))
+            for (dx, dy) in ROTATION_SHIFTS)
+        self.backsteps = tuple(
+            array('l', (self.index(x - dx, y - dy)
+                        if self.is_in_bound(x - dx, y - dy) else -1
+                        for (x, y) in zip(self.xs, self.ys)))
+            for (dx, dy) in ROTATION_SHIFTS)
+
+    def is_in_bound(self, x, y):
+        return (0 <= y < self.height and
+                self.row_first[y] <= x < self.row_end[y])
+
+    def index(self, x, y):
+        """Id of the in-bound cell (x, y)"""
+        return self.row_start[y] + x - self.row_first[y]
+
+    def coords(self, cell_id):
+        return self.xs[cell_id], self.ys[cell_id]
+
+    def ship_cells(self, anchor, rotation, length):
+        """Cell ids of a ship laid from ``anchor`` along rotation index
+        ``rotation`` or None if it leaves the field"""
+        step = self.steps[rotation]
+        cells = [anchor]
+        for _ in range(length - 1):
+            anchor = step[anchor]
+            if anchor == -1:
+                return None
+            cells.append(anchor)
+        return cells
+
+
+@functools.lru_cache(maxsize=32)
+def get_geometry(side):
+    """Shared HexGeometry of the given side, built once per side"""
+    return HexGeometry(side)
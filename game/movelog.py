@@ -0,0 +1,161 @@
+"""Append-only log of ship placements and shots, and its replay.
+
+Every move is a fixed-width record: kind, board owner, acting player,
+rotation, ship length and cell id, players being numbered in the order of
+``env.players``. Keyframes are environment snapshots taken when logging
+starts and then every ``keyframe_every`` records, each tagged with the
+number of records before it.
+"""
+import bisect
+import struct
+
+import game.environment as genv
+import game.snapshot as snapshot
+
+PLACE = 0
+SHOT = 1
+RECORD = struct.Struct('<BBBBHI')
+KEYFRAME = struct.Struct('<II')
+
+
+class MoveLog:
+    """Moves of one game, kept in memory and, with ``path``, appended to
+    the file at ``path`` and its keyframes to ``path + '.key'``"""
+
+    def __init__(self, path=None, keyframe_every=64):
+        self.path = path
+        self.keyframe_every = keyframe_every
+        self.records = bytearray()
+        self.keyframes = []
+        self.env = None
+        self.players = {}
+        self.files = None
+
+    def __len__(self):
+        return len(self.records) // RECORD.size
+
+    def start(self, env):
+        """Log every following move of ``env``"""
+        self.env = env
+        self.players = {player: i
+                        for i, player in enumerate(env.players.values())}
+        if self.path is not None:
+            self.files = (open(self.path, 'wb'),
+                          open(self.path + '.key', 'wb'))
+        env.log = self
+        self.keyframe()
+
+    def close(self):
+        if self.env is not None:
+            self.env.log = None
+        if self.files is not None:
+            for file in self.files:
+                file.close()
+            self.files = None
+
+    def keyframe(self):
+        data = snapshot.dumps(self.env)
+        self.keyframes.append((len(self), data))
+        if self.files is not None:
+            self.files[0].flush()
+            self.files[1].write(KEYFRAME.pack(len(self), len(data)) + data)
+            self.files[1].flush()
+
+    def append(self, kind, board, actor, rotation, length, cell):
+        record = RECORD.pack(kind, self.players[board.owner],
+                             self.players[actor], rotation, length, cell)
+        self.records += record
+        if self.files is not None:
+            self.files[0].write(record)
+        if len(self) % self.keyframe_every == 0:
+            self.keyframe()
+
+    def placement(self, board, key, length):
+        self.append(PLACE, board, board.owner, key % 3, length, key // 3)
+
+    def shot(self, board, shooter, cell):
+        self.append(SHOT, board, shooter, 0, 0, cell)
+
+    def record(self, index):
+        """(kind, board, actor, rotation, length, cell) of a record"""
+        return RECORD.unpack_from(self.records, index * RECORD.size)
+
+    @classmethod
+    def open(cls, path):
+        """Log read back from the files written with ``path``"""
+        log = cls(path)
+        with open(path, 'rb') as file:
+            log.records = bytearray(file.read())
+        log.records = log.records[:len(log) * RECORD.size]
+        with open(path + '.key', 'rb') as file:
+            data = memoryview(file.read())
+        offset = 0
+        while offset + KEYFRAME.size <= len(data):
+            index, size = KEYFRAME.unpack_from(data, offset)
+            offset += KEYFRAME.size
+            if offset + size > len(data) or index > len(log):
+                break
+            log.keyframes.append((index, bytes(data[offset:offset + size])))
+            offset += size
+        if not log.keyframes:
+            raise ValueError(f'{path} has no keyframes')
+        return log
+
+
+class Replay:
+    """Environment after any number of records of a MoveLog.
+
+    Seeking restores the nearest keyframe at or before the move and
+    applies the remaining records straight to the boards. After a
+    placement its owner is active, after a shot the shooter, or the
+    target's owner if the shot missed. The random generator is left as
+    it was at the keyframe.
+    """
+
+    def __init__(self, log):
+        self.log = log
+        self.indexes = [index for (index, _) in log.keyframes]
+
+    def __len__(self):
+        return len(self.log)
+
+    def state(self, moves):
+        """Environment after the first ``moves`` records"""
+        if not 0 <= moves <= len(self.log):
+            raise IndexError(f'move {moves} is out of the log')
+        start, data = self.log.keyframes[
+            bisect.bisect_right(self.indexes, moves) - 1]
+        env, _ = snapshot.loads(data)
+        players = list(env.players.values())
+        if start:
+            self.pass_turn(players, self.log.record(start - 1))
+        for index in range(start, moves):
+            record = self.log.record(index)
+            self.apply(players, record, index)
+            self.pass_turn(players, record)
+        return env
+
+    def apply(self, players, record, index):
+        kind, board, actor, rotation, length, cell = record
+        field = players[board].field
+        geom = field.geometry
+        if kind == PLACE:
+            cells = geom.ship_cells(cell, rotation, length)
+            result = field.place_ship_on_field(
+                [geom.coords(ship_cell) for ship_cell in cells])
+            if result != genv.PlacementResult.SUCCESS:
+                raise ValueError(f'placement {index} does not apply: '
+                                 f'{result}')
+        elif field.fire_cell(*geom.coords(cell),
+                             players[actor]) == genv.FireResult.UNABLE:
+            raise ValueError(f'shot {index} does not apply')
+
+    @staticmethod
+    def pass_turn(players, record):
+        kind, board, actor, _, _, cell = record
+        for player in players:
+            player.active = False
+        if kind == SHOT and players[board].field.states[cell] == genv.MISSED:
+            players[board].active = True
+        else:
+            players[actor].active = True
@@ -0,0 +1,140 @@
+import game.bitboard as bitboard
+import game.utils as utils
+
+
+class FleetGenerator:
+    """Places a hand of ships on a Honeycomb without rejection sampling.
+
+    For every ship length still in hand the generator starts from the
+    board's legal placements, encoded as ``anchor * 3 + rotation``. Placing
+    a ship blocks its cells and halo and drops every candidate crossing
+    them. The drops are recorded per placed ship, so a dead end is undone
+    exactly by restoring them and trying another candidate of the previous
+    ship.
+
+    With ``packing`` above one each ship takes the lowest of that many
+    random candidates, which packs the fleet towards the top of the field.
+    """
+
+    def __init__(self, board, rng, packing=1, max_backtracks=10000):
+        self.board = board
+        self.geometry = board.geometry
+        self.rng = rng
+        self.packing = packing
+        self.max_backtracks = max_backtracks
+        self.corners_limit = 0.1 * board.env.ships_count
+        self.corners_count = board.corner_ships_count
+        self.blocked = bytearray(self.geometry.square)
+        self.candidates = {}
+        self.lengths = []
+
+    def build_candidates(self, lengths):
+        bits = bitboard.Bitboard.from_honeycomb(self.board)
+        layout = bits.layout
+        for cell in layout.cells(layout.field & ~bits.free()):
+            self.blocked[cell] = 1
+
+        self.lengths = sorted(lengths)
+        for length in lengths:
+            self.candidates[length] = utils.IndexedSet(
+                self.board.legal_placements(length))
+
+    def ship_cells(self, key, length):
+        return self.geometry.ship_cells(key // 3, key % 3, length)
+
+    def corner_cells(self, cells):
+        return self.board.corner_cells(cells)
+
+    def block(self, cells, trail, max_length):
+        """Block ship cells with their halo, dropping crossed candidates
+        of lengths up to ``max_length``.
+
+        Longer ships are placed first, so candidates of longer lengths are
+        never picked again unless their ships are undone, which restores
+        exactly the candidate sets they were placed with.
+        """
+        geom = self.geometry
+        lengths = [(length, self.candidates[length])
+                   for length in reversed(self.lengths)
+                   if length <= max_length]
+        area = set(cells)
+        for cell in cells:
+            area.update(geom.neighbours[cell])
+        for cell in area:
+            self.blocked[cell] += 1
+            if self.blocked[cell] > 1:
+                continue
+            for rotation in range(3):
+                backstep = geom.backsteps[rotation]
+                anchor = cell
+                for offset in range(max_length):
+                    if anchor == -1:
+                        break
+                    key = anchor * 3 + rotation
+                    for length, candidates in lengths:
+                        if length <= offset:
+                            break
+                        if key in candidates:
+                            candidates.discard(key)
+                            trail.append((length, key))
+                    anchor = backstep[anchor]
+        return area
+
+    def unblock(self, area, trail):
+        for cell in area:
+            self.blocked[cell] -= 1
+        self.restore(trail)
+
+    def restore(self, trail):
+        for length, key in trail:
+            self.candidates[length].add(key)
+        trail.clear()
+
+    def pick(self, length, rejected):
+        """Random legal placement of the given length or None"""
+        candidates = self.candidates[length]
+        while candidates:
+            key = min(candidates.choice(self.rng)
+                      for _ in range(self.packing))
+            cells = self.ship_cells(key, length)
+            if (self.corners_count + self.corner_cells(cells) <=
+                    self.corners_limit):
+                return key, cells
+            candidates.discard(key)
+            rejected.append((length, key))
+        return None
+
+    def generate(self, hand):
+        """Cell ids of every ship of ``hand``, longest first, or None
+        if the hand does not fit into the board"""
+        hand = sorted(hand, reverse=True)
+        if not hand:
+            return []
+        self.build_candidates(set(hand))
+
+        placed = []
+        rejected = [[] for _ in hand]
+        backtracks = 0
+        while len(placed) < len(hand):
+            level = len(placed)
+            picked = self.pick(hand[level], rejected[level])
+            if picked is not None:
+                key, cells = picked
+                trail = []
+                area = self.block(cells, trail, hand[level + 1]
+                                  if level + 1 < len(hand) else 0)
+                self.corners_count += self.corner_cells(cells)
+                placed.append((key, cells, area, trail))
+                continue
+
+            backtracks += 1
+            if not placed or backtracks > self.max_backtracks:
+                return None
+            self.restore(rejected[level])
+            key, cells, area, trail = placed.pop()
+            self.unblock(area, trail)
+            self.corners_count -= self.corner_cells(cells)
+            self.candidates[hand[level - 1]].discard(key)
+            rejected[level - 1].append((hand[level - 1], key))
+
+        return [cells for (_, cells, _, _) in placed]
@@ -0,0 +1,182 @@
+import functools
+import sys
+
+import game.environment as genv
+import game.geometry as geometry
+import game.utils as utils
+
+CELL_SPACING = '   '
+CLEAR_SCREEN = '\033[2J\033[H'
+
+
+class Frame:
+    """Static parts of the printed field of the given side: the column
+    header, and the indentation with the row label before every row and
+    the column number after it. ``columns[y]`` is the printed width of
+    the row's prefix"""
+
+    def __init__(self, side):
+        geom = geometry.get_geometry(side)
+        blue, purple, default = (genv.Color.BLUE.value,
+                                 genv.Color.PURPLE.value,
+                                 genv.Color.DEFAULT.value)
+        spaces_count = side * 2
+        self.header = (' ' * (spaces_count + 1) + '     ' +
+                       ''.join(blue + str(x + 1) + default + CELL_SPACING
+                               for x in range(side)) + '\n')
+        self.prefixes = []
+        self.suffixes = []
+        self.columns = []
+        for y in range(geom.height):
+            letters = utils.Utils.number_to_letters(y)
+            self.prefixes.append(' ' * (spaces_count - len(letters) + 1) +
+                                 purple + letters + default + CELL_SPACING)
+            self.columns.append(spaces_count + 1 + len(CELL_SPACING))
+            if y < side - 1:
+                self.suffixes.append(blue + str(geom.row_end[y] + 1) +
+                                     default + '\n')
+                spaces_count -= 2
+            else:
+                self.suffixes.append('\n')
+                spaces_count += 2
+
+
+@functools.lru_cache(maxsize=32)
+def get_frame(side):
+    return Frame(side)
+
+
+@functools.lru_cache(maxsize=4)
+def get_cell_texts(hide_ships, plain_green):
+    """Printed text with spacing of every (state code, color code) pair"""
+    default = genv.Color.DEFAULT.value
+    texts = []
+    for state in genv.STATES:
+        row = []
+        for color in genv.COLORS:
+            if state == genv.CellState.SHIP and hide_ships:
+                text = color.value + genv.CellState.EMPTY.value + default
+            elif color == genv.Color.GREEN and plain_green:
+                text = state.value
+            else:
+                text = color.value + state.value + default
+            row.append(text + CELL_SPACING)
+        texts.append(tuple(row))
+    return tuple(texts)
+
+
+def view_mode(board):
+    """Whether ships are hidden and green cells printed without color"""
+    return (not board.owner.active,
+            board.owner.active and board.owner.is_fleet_placed())
+
+
+def render_row(board, frame, texts, y):
+    geom = board.geometry
+    states = board.states
+    colors = board.colors
+    start = geom.row_start[y]
+    end = start + geom.row_end[y] - geom.row_first[y]
+    return (frame.prefixes[y] +
+            ''.join([texts[states[cell]][colors[cell]]
+                     for cell in range(start, end)]) +
+            frame.suffixes[y])
+
+
+class BoardRenderer:
+    """Prints a Honeycomb, re-rendering only the rows with changed cells.
+
+    The board appends the id of every cell it changes to ``changes`` (-1
+    when all of them change), the renderer remembers how much of that
+    journal it has already applied.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.frame = get_frame(board.side)
+        self.rows = [None] * board.geometry.height
+        self.mode = None
+        self.seen = 0
+
+    def invalidate(self):
+        changes = self.board.changes
+        mode = view_mode(self.board)
+        if mode != self.mode or -1 in changes[self.seen:]:
+            self.mode = mode
+            self.rows = [None] * len(self.rows)
+        else:
+            ys = self.board.geometry.ys
+            for cell in changes[self.seen:]:
+                self.rows[ys[cell]] = None
+        self.seen = len(changes)
+
+    def render_row(self, y):
+        return render_row(self.board, self.frame,
+                          get_cell_texts(*self.mode), y)
+
+    def render(self):
+        self.invalidate()
+        for y, row in enumerate(self.rows):
+            if row is None:
+                self.rows[y] = self.render_row(y)
+        return self.frame.header + ''.join(self.rows)
+
+
+def render_view(board, hide_ships):
+    """Whole board as seen by its owner or, with ``hide_ships``, by the
+    enemy, regardless of whose turn it is"""
+    frame = get_frame(board.side)
+    texts = get_cell_texts(hide_ships, False)
+    return frame.header + ''.join(render_row(board, frame, texts, y)
+                                  for y in range(board.geometry.height))
+
+
+def clear_screen():
+    """Clear the terminal without spawning a process"""
+    sys.stdout.write(CLEAR_SCREEN)
+    sys.stdout.flush()
+
+
+class TerminalPainter:
+    """Keeps a Honeycomb drawn at the top of the terminal and repaints
+    only the cells changed since the previous draw.
+
+    The first draw, a different board, a view mode change or ``reset``
+    (after anything else cleared the screen) clears the screen and prints
+    the whole board. Later draws move the cursor to every changed cell,
+    rewrite it and clear the screen below the board.
+    """
+
+    def __init__(self):
+        self.board = None
+        self.mode = None
+        self.seen = 0
+
+    def reset(self):
+        self.board = None
+
+    def paint(self, board):
+        mode = view_mode(board)
+        changes = board.changes
+        if (board is not self.board or mode != self.mode or
+                -1 in changes[self.seen:]):
+            self.board = board
+            self.mode = mode
+            self.seen = len(changes)
+            return CLEAR_SCREEN + str(board)
+
+        geom = board.geometry
+        frame = get_frame(board.side)
+        texts = get_cell_texts(*mode)
+        result = []
+        for cell in dict.fromkeys(changes[self.seen:]):
+            y = geom.ys[cell]
+            column = (frame.columns[y] + 1 +
+                      (geom.xs[cell] - geom.row_first[y]) *
+                      (1 + len(CELL_SPACING)))
+            text = texts[board.states[cell]][board.colors[cell]]
+            result.append(f'\033[{y + 2};{column}H' +
+                          text[:-len(CELL_SPACING)])
+        self.seen = len(changes)
+        result.append(f'\033[{geom.height + 2};1H\033[J')
+        return ''.join(result)
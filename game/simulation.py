@@ -0,0 +1,158 @@
+import concurrent.futures
+import os
+import random
+import time
+from array import array
+
+import game.environment as genv
+import game.movelog as movelog
+
+
+class SimulationStats:
+    """Aggregate results of bot-vs-bot games"""
+
+    def __init__(self, bots):
+        self.bots = tuple(bots)
+        self.games = 0
+        self.wins = [0] * len(self.bots)
+        self.winner_shots = 0
+        self.elapsed = 0.0
+
+    def add_game(self, winner, shots):
+        self.games += 1
+        self.wins[winner] += 1
+        self.winner_shots += shots
+
+    def add_batch(self, packed):
+        """Add results packed by ``play_batch``"""
+        results = array('L')
+        results.frombytes(packed)
+        for result in results:
+            self.add_game(result % len(self.bots), result // len(self.bots))
+
+    def merge(self, other):
+        self.games += other.games
+        self.winner_shots += other.winner_shots
+        for i, wins in enumerate(other.wins):
+            self.wins[i] += wins
+
+    @property
+    def games_per_second(self):
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def mean_shots(self):
+        return self.winner_shots / self.games if self.games else 0.0
+
+    def win_rates(self):
+        return [wins / self.games if self.games else 0.0
+                for wins in self.wins]
+
+    def __str__(self):
+        result = [f'games: {self.games}',
+                  f'time: {self.elapsed:.2f} s',
+                  f'games/second: {self.games_per_second:.1f}',
+                  f'mean shots to win: {self.mean_shots:.1f}']
+        for i, (diff, rate) in enumerate(zip(self.bots, self.win_rates())):
+            result.append(f'bot {i} (difficulty {diff}) win rate: '
+                          f'{rate:.3f}')
+        return '\n'.join(result)
+
+
+def build_environment(side, ship_max, bots, seed=None):
+    """Environment with one bot player per difficulty in ``bots``, the
+    first one is active"""
+    env = genv.Environment(side, bots[0], ship_max, seed)
+    for i, diff in enumerate(bots):
+        env.diff = diff
+        env.add_player(genv.PlayerType.BOT, f'bot{i}')
+    env.players['bot0'].active = True
+    return env
+
+
+def play_game(env):
+    """Play a bot-vs-bot game to the end, returns the index of the winner
+    and its shots count"""
+    players = list(env.players.values())
+    turn = 0
+    while True:
+        shooter = players[turn]
+        enemy = players[1 - turn]
+        result = shooter.bot.fire(env)
+        if enemy.is_player_defeated():
+            return turn, shooter.shots_count
+        if result == genv.FireResult.MISSED:
+            shooter.active = False
+            enemy.active = True
+            turn = 1 - turn
+
+
+def play_logged_game(env, log_dir, game_seed):
+    """``play_game`` recording the moves to a log named after the game's
+    seed in ``log_dir``"""
+    log = movelog.MoveLog(os.path.join(log_dir, f'{game_seed:016x}.log'))
+    log.start(env)
+    try:
+        return play_game(env)
+    finally:
+        log.close()
+
+
+def simulate(games, side=6, ship_max=4, bots=(0, 1), seed=None,
+             log_dir=None):
+    """Play ``games`` bot-vs-bot games without any I/O but the optional
+    move logs in ``log_dir``.
+
+    Every game gets its own seed drawn from ``seed``, so a run is
+    reproducible as a whole."""
+    stats = SimulationStats(bots)
+    seeds = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(games):
+        game_seed = seeds.getrandbits(64)
+        env = build_environment(side, ship_max, bots, game_seed)
+        if log_dir is None:
+            stats.add_game(*play_game(env))
+        else:
+            stats.add_game(*play_logged_game(env, log_dir, game_seed))
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def play_batch(side, ship_max, bots, seed, games, log_dir=None):
+    """Play ``games`` games seeded from ``seed`` and pack every result as
+    ``shots * len(bots) + winner`` into an array of unsigned longs"""
+    seeds = random.Random(seed)
+    results = array('L')
+    for _ in range(games):
+        game_seed = seeds.getrandbits(64)
+        env = build_environment(side, ship_max, bots, game_seed)
+        if log_dir is None:
+            winner, shots = play_game(env)
+        else:
+            winner, shots = play_logged_game(env, log_dir, game_seed)
+        results.append(shots * len(bots) + winner)
+    return results.tobytes()
+
+
+def simulate_parallel(games, side=6, ship_max=4, bots=(0, 1), seed=None,
+                      workers=None, batch_size=500, log_dir=None):
+    """Play ``games`` games split into batches over a process pool.
+
+    Batch seeds are drawn from ``seed``, so results depend on
+    ``batch_size`` but not on ``workers`` or on the order batches finish
+    in. Workers send back packed results only."""
+    stats = SimulationStats(bots)
+    seeds = random.Random(seed)
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        futures = []
+        for first in range(0, games, batch_size):
+            futures.append(executor.submit(
+                play_batch, side, ship_max, tuple(bots),
+                seeds.getrandbits(64), min(batch_size, games - first),
+                log_dir))
+        for future in concurrent.futures.as_completed(futures):
+            stats.add_batch(future.result())
+    stats.elapsed = time.perf_counter() - start
+    return stats
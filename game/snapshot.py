@@ -0,0 +1,178 @@
+"""Binary snapshots of an Environment.
+
+A snapshot is a header followed by one record per player, all integers
+are little-endian:
+
+* header: magic, format version, side, ship_max, difficulty, players
+  count, lengths of the game mode and seed strings, then both strings
+  and the state of the environment's random generator
+* player: name length, type, bot difficulty, active flag, shots, missed,
+  fleet, corner cells taken, hand size, ships count, unshot cells count,
+  then the name, the hand, the length, halo size and cells still afloat
+  of every ship, the cells of all ships, of all halos and of the unshot
+  index, and the board's ``states``, ``colors`` and ``ship_at``
+
+Boards are stored exactly as Honeycomb keeps them, so saving is a few
+buffer copies and loading reads them straight out of an mmap.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+import game.environment as genv
+import game.utils as utils
+
+MAGIC = b'CBSN'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHBBBB')
+RANDOM_STATE = struct.Struct('<B625I?d')
+PLAYER = struct.Struct('<HBB?IIIIHII')
+
+
+def to_bytes(values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def from_bytes(typecode, buffer):
+    values = array(typecode)
+    values.frombytes(buffer)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def dumps(env, mode=''):
+    """Snapshot of ``env`` as bytes, ``mode`` is stored along for the
+    caller"""
+    mode = mode.encode()
+    seed = b'' if env.seed is None else str(env.seed).encode()
+    version, state, gauss = env.random.getstate()
+    parts = [HEADER.pack(MAGIC, VERSION, env.side, env.ship_max, env.diff,
+                         len(env.players), len(mode), len(seed)),
+             mode, seed,
+             RANDOM_STATE.pack(version, *state, gauss is not None,
+                               gauss or 0.0)]
+    for name, player in env.players.items():
+        name = name.encode()
+        board = player.field
+        diff = player.AI.diff if player.type == genv.PlayerType.BOT else 0
+        parts.append(PLAYER.pack(len(name), player.type.value, diff,
+                                 player.active, player.shots_count,
+                                 player.missed_count,
+                                 player.fleet, board.corner_ships_count,
+                                 len(player.hand), len(board.ships),
+                                 len(board.unshot)))
+        parts.append(name)
+        parts.append(to_bytes(array('H', player.hand)))
+        parts.append(to_bytes(array('H', (value for ship in board.ships
+                                          for value in (len(ship),
+                                                        len(ship.halo),
+                                                        ship.alive)))))
+        parts.append(to_bytes(array('i', (cell for ship in board.ships
+                                          for cell in ship.cells))))
+        parts.append(to_bytes(array('i', (cell for ship in board.ships
+                                          for cell in ship.halo))))
+        parts.append(to_bytes(array('i', board.unshot.items)))
+        parts.append(board.states)
+        parts.append(board.colors)
+        parts.append(to_bytes(board.ship_at))
+    return b''.join(parts)
+
+
+class Reader:
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        self.offset = 0
+
+    def take(self, size):
+        if self.offset + size > len(self.buffer):
+            raise ValueError('snapshot is truncated')
+        chunk = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def unpack(self, layout):
+        return layout.unpack(self.take(layout.size))
+
+    def array(self, typecode, count):
+        return from_bytes(typecode,
+                          self.take(count * array(typecode).itemsize))
+
+
+def loads(buffer):
+    """Environment and game mode saved by ``dumps``, bot players are
+    restored without generating their fleets"""
+    reader = Reader(buffer)
+    try:
+        return read_environment(reader)
+    finally:
+        reader.buffer.release()
+
+
+def read_environment(reader):
+    (magic, version, side, ship_max, diff, players_count, mode_size,
+     seed_size) = reader.unpack(HEADER)
+    if magic != MAGIC:
+        raise ValueError('not a game snapshot')
+    if version != VERSION:
+        raise ValueError(f'unsupported snapshot version {version}')
+    mode = str(reader.take(mode_size), 'utf-8')
+    seed = str(reader.take(seed_size), 'ascii')
+    env = genv.Environment(side, diff, ship_max, int(seed) if seed else None)
+    version, *state, has_gauss, gauss = reader.unpack(RANDOM_STATE)
+    env.random.setstate((version, tuple(state),
+                         gauss if has_gauss else None))
+
+    for _ in range(players_count):
+        (name_size, typ, env.diff, active, shots, missed, fleet, corners,
+         hand_size, ships_count, unshot_size) = reader.unpack(PLAYER)
+        name = str(reader.take(name_size), 'utf-8')
+        player = genv.Player(genv.PlayerType(typ), env, generate=False)
+        player.active = active
+        player.shots_count = shots
+        player.missed_count = missed
+        player.fleet = fleet
+        player.hand = reader.array('H', hand_size).tolist()
+
+        board = player.field
+        board.corner_ships_count = corners
+        sizes = reader.array('H', ships_count * 3)
+        cells = reader.array('i', sum(sizes[0::3])).tolist()
+        halos = reader.array('i', sum(sizes[1::3])).tolist()
+        board.unshot = utils.IndexedSet.from_unique(
+            reader.array('i', unshot_size))
+        board.states[:] = reader.take(board.square)
+        board.colors[:] = reader.take(board.square)
+        board.ship_at = reader.array('i', board.square)
+        cell = halo = 0
+        for i in range(0, len(sizes), 3):
+            length, halo_size, alive = sizes[i:i + 3]
+            ship = genv.Ship(tuple(cells[cell:cell + length]),
+                             tuple(halos[halo:halo + halo_size]))
+            ship.alive = alive
+            board.ships.append(ship)
+            cell += length
+            halo += halo_size
+        env.players[name] = player
+    env.diff = diff
+
+    for player in env.players.values():
+        if player.type == genv.PlayerType.BOT:
+            player.bot.resume(env)
+    return env, mode
+
+
+def save(path, env, mode=''):
+    with open(path, 'wb') as file:
+        file.write(dumps(env, mode))
+
+
+def load(path):
+    """Environment and game mode from the snapshot file at ``path``"""
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return loads(data)
@@ -19,12 +19,52 @@ class Utils:
             res += (ord(letters[-i]) - ord('A') + 1) * (26 ** i)
         return res - 1
 
-    @staticmethod
-    def get_ship_borders(x, y):
-        return {'ceil_y': y + 2,
-                'floor_y': y - 1,
-                'ceil_x': x + 2,
-                'floor_x': x - 1}
+
+class IndexedSet:
+    """Set with O(1) add, discard and uniform random choice.
+
+    Items are kept in a list, removal swaps the last item into the freed
+    slot, ``positions`` maps every item to its slot.
+    """
+
+    def __init__(self, items=()):
+        self.items = list(dict.fromkeys(items))
+        self.positions = dict(zip(self.items, range(len(self.items))))
+
+    @classmethod
+    def from_unique(cls, items):
+        """IndexedSet of items known to be distinct, in their order"""
+        result = cls.__new__(cls)
+        result.items = list(items)
+        result.positions = dict(zip(result.items, range(len(result.items))))
+        return result
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item):
+        if item not in self.positions:
+            self.positions[item] = len(self.items)
+            self.items.append(item)
+
+    def discard(self, item):
+        pos = self.positions.pop(item, None)
+        if pos is None:
+            return False
+        last = self.items.pop()
+        if pos < len(self.items):
+            self.items[pos] = last
+            self.positions[last] = pos
+        return True
+
+    def choice(self, rng):
+        return self.items[rng.randrange(len(self.items))]
 
 
 class TwitterUtils():
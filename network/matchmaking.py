@@ -0,0 +1,160 @@
+"""Pairing of players looking for a game and bot opponents for them.
+
+Bots generate their fleets and take their turns on a bounded pool of
+worker threads, so the event loop keeps serving connections meanwhile.
+"""
+import asyncio
+import concurrent.futures
+
+import game.environment as genv
+
+BOT_MODE = 'bot'
+HUMAN_MODE = 'human'
+
+
+class BotSeat:
+    """Session seat played by a BotAI"""
+
+    def __init__(self, name, scheduler):
+        self.name = name
+        self.scheduler = scheduler
+        self.session = None
+
+    def event(self, message):
+        pass
+
+    def take_turn(self):
+        self.scheduler.start(self.scheduler.bot_turn(self))
+
+
+def make_bot_player(env, diff):
+    """Bot player of ``env`` with its fleet generated"""
+    env.diff = diff
+    return genv.Player(genv.PlayerType.BOT, env)
+
+
+def play_bot_turn(env, name):
+    """Fire with the bot until it misses or wins, returns the cells shot
+    and the results"""
+    player = env.players[name]
+    _, enemy = env.get_nonactive_player()
+    board = enemy.field
+    shots = []
+    while True:
+        # the target is the first cell the shot journals as changed
+        first_change = len(board.changes)
+        result = player.bot.fire(env)
+        shots.append((board.changes[first_change], result))
+        if result == genv.FireResult.MISSED or enemy.is_player_defeated():
+            return shots
+
+
+class BotScheduler:
+    """Runs bot work on at most ``workers`` threads"""
+
+    def __init__(self, workers=4):
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers)
+        self.tasks = set()
+
+    def start(self, coroutine):
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, function, *args)
+
+    async def seat_bot(self, session, diff):
+        name = 'bot' if not session.env.player_exists('bot') else 'bot2'
+        try:
+            player = await self.run(make_bot_player, session.env, diff)
+        except ValueError:
+            session.broadcast('unable to generate bot field')
+            session.finished = True
+            return
+        if not session.finished:
+            session.env.players[name] = player
+            session.seat(BotSeat(name, self))
+
+    async def bot_turn(self, seat):
+        session = seat.session
+        shots = await self.run(play_bot_turn, session.env, seat.name)
+        session.bot_fired(seat, shots)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Ticket:
+    def __init__(self, connection, name, diff):
+        self.connection = connection
+        self.name = name
+        self.diff = diff
+        self.timer = None
+
+
+class Matchmaker:
+    """Queues players by ``(side, ship_max, mode)``.
+
+    A player asking for a human opponent is paired with the first one
+    waiting with the same key, or gets a bot of the difficulty they asked
+    for after ``bot_timeout`` seconds. Players asking for a bot get one at
+    once.
+    """
+
+    def __init__(self, game_server, bot_timeout=10.0):
+        self.server = game_server
+        self.bot_timeout = bot_timeout
+        self.queues = {}
+        self.tickets = {}
+
+    def is_waiting(self, connection):
+        return connection in self.tickets
+
+    def request(self, connection, name, side, ship_max, mode, diff):
+        if mode == BOT_MODE:
+            self.start_bot_game(connection, name, side, ship_max, diff)
+            return ['looking for a bot opponent']
+
+        key = (side, ship_max, mode)
+        queue = self.queues.setdefault(key, [])
+        for ticket in queue:
+            if ticket.name != name:
+                self.remove(key, ticket)
+                session = self.server.new_session(side, ship_max)
+                session.add(ticket.connection, ticket.name)
+                session.add(connection, name)
+                return []
+
+        ticket = Ticket(connection, name, diff)
+        ticket.timer = asyncio.get_running_loop().call_later(
+            self.bot_timeout, self.expire, key, ticket)
+        queue.append(ticket)
+        self.tickets[connection] = key, ticket
+        return ['waiting for opponent']
+
+    def remove(self, key, ticket):
+        ticket.timer.cancel()
+        self.queues[key].remove(ticket)
+        if not self.queues[key]:
+            del self.queues[key]
+        del self.tickets[ticket.connection]
+
+    def expire(self, key, ticket):
+        self.remove(key, ticket)
+        side, ship_max, _ = key
+        ticket.connection.event('no opponent found, playing with a bot')
+        self.start_bot_game(ticket.connection, ticket.name, side, ship_max,
+                            ticket.diff)
+
+    def start_bot_game(self, connection, name, side, ship_max, diff):
+        session = self.server.new_session(side, ship_max)
+        session.add(connection, name)
+        self.server.scheduler.start(
+            self.server.scheduler.seat_bot(session, diff))
+
+    def cancel(self, connection):
+        if connection in self.tickets:
+            self.remove(*self.tickets[connection])
+
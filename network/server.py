@@ -0,0 +1,387 @@
+"""Asyncio TCP server hosting games between remote players.
+
+Clients speak a line protocol mirroring the CLI commands:
+
+    join <room> <name> [side ship_max]
+    find <name> [side ship_max] [human | bot] [difficulty]
+    place <ship_len> <vl | vr | h> <d> <L>
+    auto
+    show <my | other>
+    fire <d> <L>
+    stat
+    quit
+
+``join`` meets the other player in a named room, ``find`` asks the
+matchmaker for a human opponent, or a bot if none shows up in time.
+Every command is answered by zero or more lines of output followed by
+``ok`` or ``error: <reason>``. Moves of the opponent and turn changes
+arrive at any time as lines starting with ``event:``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+import game.boardpool as boardpool
+import game.environment as genv
+import game.geometry as geometry
+import game.render as render
+import game.utils as utils
+import network.matchmaking as matchmaking
+
+JOIN_RE = re.compile(r'join (\S+) (\S+)(?: (\d+) (\d+))?$')
+FIND_RE = re.compile(
+    r'find (\S+)(?: (\d+) (\d+))?(?: (human|bot))?(?: (\d))?$')
+PLACE_RE = re.compile(r'place (\d+) (h|vl|vr) (\d{1,2}) ([A-Za-z]+)$')
+FIRE_RE = re.compile(r'fire (\d{1,2}) ([A-Za-z]+)$')
+SHOW_RE = re.compile(r'show (my|other)$')
+
+
+class CommandError(Exception):
+    pass
+
+
+def fits(side, ship_max):
+    """Whether a fleet with ``ship_max`` fits a field with ``side`` as
+    densely as the CLI allows"""
+    if side < 2 or ship_max < 1:
+        return False
+    ship_cells = genv.Environment(side, 0, ship_max).ship_cells
+    return sum(ship_cells) / geometry.get_geometry(side).square <= 0.3
+
+
+def cell_name(x, y):
+    return f'{x + 1} {utils.Utils.number_to_letters(y)}'
+
+
+class Session:
+    """Game between two connections, the first one to join moves first"""
+
+    def __init__(self, room, side, ship_max, seed=None):
+        self.room = room
+        self.env = genv.Environment(side, 0, ship_max, seed)
+        self.connections = []
+        self.finished = False
+
+    @property
+    def started(self):
+        return len(self.connections) == 2
+
+    def add(self, connection, name):
+        if self.env.player_exists(name):
+            raise CommandError(f'name {name} is taken')
+        self.env.add_player(genv.PlayerType.USER, name)
+        if not self.connections:
+            self.env.players[name].active = True
+        connection.name = name
+        self.seat(connection)
+
+    def seat(self, connection):
+        """Seat a connection or a bot whose player is already added"""
+        self.connections.append(connection)
+        connection.session = self
+        if self.started:
+            self.broadcast('game started, place your fleet')
+
+    def player(self, connection):
+        return self.env.players[connection.name]
+
+    def opponent(self, connection):
+        for other in self.connections:
+            if other is not connection:
+                return other
+        return None
+
+    def broadcast(self, message):
+        for connection in self.connections:
+            connection.event(message)
+
+    def is_placed(self):
+        return all(player.is_fleet_placed()
+                   for player in self.env.players.values())
+
+    def check_placing(self, connection):
+        if not self.started:
+            raise CommandError('waiting for opponent')
+        if self.player(connection).is_fleet_placed():
+            raise CommandError('fleet is already placed')
+
+    def fleet_placed(self, connection):
+        self.opponent(connection).event(f'{connection.name} placed their '
+                                        f'fleet')
+        if self.is_placed():
+            self.broadcast('all fleets placed')
+            for seat in self.connections:
+                if self.player(seat).active:
+                    seat.take_turn()
+
+    def place(self, connection, ship_len, rotation, x, letters):
+        self.check_placing(connection)
+        y = utils.Utils.letters_to_number(letters)
+        dx, dy = geometry.ROTATION_SHIFTS[geometry.ROTATIONS.index(rotation)]
+        player = self.player(connection)
+        result = player.field.place_ship_on_field(
+            [(x + dx * i, y + dy * i) for i in range(ship_len)])
+        if result != genv.PlacementResult.SUCCESS:
+            raise CommandError(str(result))
+        if player.is_fleet_placed():
+            self.fleet_placed(connection)
+        return [str(result)]
+
+    def auto(self, connection):
+        self.check_placing(connection)
+        if not self.player(connection).field.auto_generate():
+            raise CommandError('unable to generate field')
+        self.fleet_placed(connection)
+        return ['Field was generated']
+
+    def show(self, connection, whose):
+        if whose == 'my':
+            board = render.render_view(self.player(connection).field, False)
+        else:
+            other = self.opponent(connection)
+            if other is None:
+                raise CommandError('waiting for opponent')
+            board = render.render_view(self.player(other).field, True)
+        return board.rstrip('\n').split('\n')
+
+    def fire(self, connection, x, letters):
+        player = self.player(connection)
+        if not self.started or not self.is_placed():
+            raise CommandError('fleets are not placed yet')
+        if self.finished:
+            raise CommandError('game is over')
+        if not player.active:
+            raise CommandError('not your move')
+        y = utils.Utils.letters_to_number(letters)
+        enemy = self.player(self.opponent(connection))
+        result = enemy.field.fire_cell(x, y, player)
+        if result == genv.FireResult.UNABLE:
+            raise CommandError(str(result))
+        self.shot_fired(connection, x, y, result)
+        return [str(result)]
+
+    def shot_fired(self, shooter, x, y, result):
+        """Tell the opponent of ``shooter`` about the shot and end the game
+        or pass the turn"""
+        other = self.opponent(shooter)
+        enemy = self.player(other)
+        other.event(f'{shooter.name} fired at {cell_name(x, y)}: {result}')
+        if enemy.is_player_defeated():
+            self.finished = True
+            shooter.event('you won!')
+            other.event('you lost')
+        elif result == genv.FireResult.MISSED:
+            self.player(shooter).active = False
+            enemy.active = True
+            other.take_turn()
+
+    def bot_fired(self, seat, shots):
+        if self.finished:
+            return
+        geom = self.player(seat).field.geometry
+        for cell, result in shots:
+            self.shot_fired(seat, *geom.coords(cell), result)
+
+    def stat(self, connection):
+        lines = []
+        for name, player in self.env.players.items():
+            lines += [f'{name}:', f'shots: {player.shots_count}',
+                      f'missed: {player.missed_count}']
+        return lines
+
+    def leave(self, connection):
+        self.connections.remove(connection)
+        if not self.finished:
+            self.finished = True
+            for other in self.connections:
+                other.event(f'{connection.name} left the game')
+
+
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.name = None
+        self.session = None
+
+    def send(self, lines):
+        if not self.writer.is_closing():
+            self.writer.write(''.join(line + '\n'
+                                      for line in lines).encode())
+
+    def event(self, message):
+        self.send([f'event: {message}'])
+
+    def take_turn(self):
+        self.event('your move')
+
+
+class GameServer:
+    """Hosts any number of Sessions in one event loop, sessions are
+    found by room name"""
+
+    def __init__(self, side=6, ship_max=4, seed=None, bot_timeout=10.0,
+                 bot_workers=4, pool_size=8):
+        self.side = side
+        self.ship_max = ship_max
+        self.seeds = random.Random(seed)
+        self.rooms = {}
+        self.pool = None
+        if pool_size > 0:
+            self.pool = boardpool.BoardPool(pool_size,
+                                            self.seeds.getrandbits(64))
+            for packing in (1, 8):
+                self.pool.reserve(side, ship_max, packing)
+        self.scheduler = matchmaking.BotScheduler(bot_workers)
+        self.matchmaker = matchmaking.Matchmaker(self, bot_timeout)
+
+    async def start(self, host='localhost', port=0):
+        return await asyncio.start_server(self.handle, host, port)
+
+    def new_session(self, side, ship_max, room=None):
+        session = Session(room, side, ship_max, self.seeds.getrandbits(64))
+        session.env.pool = self.pool
+        return session
+
+    def leave_finished(self, connection):
+        if self.matchmaker.is_waiting(connection):
+            raise CommandError('already waiting for a game')
+        if connection.session is not None:
+            if not connection.session.finished:
+                raise CommandError('already in a game')
+            self.disconnect(connection)
+
+    def sizes(self, side, ship_max):
+        side = side or self.side
+        ship_max = ship_max or self.ship_max
+        if not fits(side, ship_max):
+            raise CommandError('impossible size values')
+        return side, ship_max
+
+    def join(self, connection, room, name, side, ship_max):
+        self.leave_finished(connection)
+        session = self.rooms.get(room)
+        if session is None or session.started:
+            session = self.new_session(*self.sizes(side, ship_max), room)
+        session.add(connection, name)
+        self.rooms[room] = session
+        if not session.started:
+            return ['waiting for opponent']
+        return []
+
+    def execute(self, connection, command):
+        match = JOIN_RE.match(command)
+        if match:
+            room, name, side, ship_max = match.groups()
+            return self.join(connection, room, name,
+                             int(side) if side else None,
+                             int(ship_max) if ship_max else None)
+        match = FIND_RE.match(command)
+        if match:
+            name, side, ship_max, mode, diff = match.groups()
+            self.leave_finished(connection)
+            return self.matchmaker.request(
+                connection, name,
+                *self.sizes(int(side) if side else None,
+                            int(ship_max) if ship_max else None),
+                mode or matchmaking.HUMAN_MODE, int(diff) if diff else 0)
+        session = connection.session
+        if session is None:
+            raise CommandError('join a game first')
+        if command == 'auto':
+            return session.auto(connection)
+        if command == 'stat':
+            return session.stat(connection)
+        match = PLACE_RE.match(command)
+        if match:
+            ship_len, rotation, x, letters = match.groups()
+            return session.place(connection, int(ship_len), rotation,
+                                 int(x) - 1, letters.upper())
+        match = FIRE_RE.match(command)
+        if match:
+            x, letters = match.groups()
+            return session.fire(connection, int(x) - 1, letters.upper())
+        match = SHOW_RE.match(command)
+        if match:
+            return session.show(connection, match.group(1))
+        raise CommandError(f"unknown command '{command}'")
+
+    def disconnect(self, connection):
+        self.matchmaker.cancel(connection)
+        session = connection.session
+        if session is None:
+            return
+        session.leave(connection)
+        if session.room is not None and (
+                self.rooms.get(session.room) is session) and (
+                session.finished or not session.connections):
+            del self.rooms[session.room]
+        connection.session = None
+
+    def close(self):
+        self.scheduler.shutdown()
+        if self.pool is not None:
+            self.pool.close()
+
+    async def handle(self, reader, writer):
+        connection = Connection(reader, writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = ' '.join(line.decode(errors='replace').split())
+                if command == 'quit':
+                    break
+                if not command:
+                    continue
+                try:
+                    lines = self.execute(connection, command)
+                    connection.send(lines + ['ok'])
+                except CommandError as e:
+                    connection.send([f'error: {e}'])
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(connection)
+            writer.close()
+
+
+async def serve(host, port, side, ship_max, bot_timeout, bot_workers,
+                pool_size):
+    game_server = GameServer(side, ship_max, bot_timeout=bot_timeout,
+                             bot_workers=bot_workers,
+                             pool_size=pool_size)
+    server = await game_server.start(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        game_server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Battlebee game server')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--side', type=int, default=6)
+    parser.add_argument('--ship-max', type=int, default=4)
+    parser.add_argument('--bot-timeout', type=float, default=10.0,
+                        help='seconds to wait for a human opponent before '
+                             'pairing with a bot')
+    parser.add_argument('--bot-workers', type=int, default=4,
+                        help='threads running bot moves')
+    parser.add_argument('--pool-size', type=int, default=8,
+                        help='fleets to generate ahead per field size, '
+                             '0 to generate on demand')
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.side, args.ship_max,
+                      args.bot_timeout, args.bot_workers,
+                      args.pool_size))
@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+from game.bitboard import Bitboard, get_layout
+from game.environment import Environment, Player, PlayerType
+
+
+class BitboardTest(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(5, 0, 3, seed=7)
+        self.env.add_player(PlayerType.USER, 'user')
+        self.field = self.env.players['user'].field
+        self.geometry = self.field.geometry
+
+    def legal(self, length, rotation):
+        result = []
+        for cell in range(self.geometry.square):
+            cells = self.geometry.ship_cells(cell, rotation, length)
+            if cells and all(self.field.is_cell_free(c) for c in cells):
+                result.append(cell)
+        return result
+
+    def test_layout_round_trip(self):
+        layout = get_layout(5)
+        cells = [0, 4, 17, self.geometry.square - 1]
+        self.assertEqual(cells, layout.cells(layout.mask(cells)))
+        self.assertEqual(list(range(self.geometry.square)),
+                         layout.cells(layout.field))
+
+    def test_dilate_matches_neighbours(self):
+        layout = get_layout(5)
+        for cell in (0, 9, 30, self.geometry.square - 1):
+            self.assertEqual(
+                sorted((cell,) + self.geometry.neighbours[cell]),
+                layout.cells(layout.dilate(layout.mask([cell]))))
+
+    def test_placements_match_cell_checks(self):
+        self.field.place_ship_on_field([(2, 2), (3, 2), (4, 2)])
+        self.field.place_ship_on_field([(5, 7)])
+        bits = Bitboard.from_honeycomb(self.field)
+        for length in range(1, 7):
+            for rotation in range(3):
+                self.assertEqual(
+                    self.legal(length, rotation),
+                    bits.layout.cells(bits.placements(length, rotation)))
+        self.assertTrue(bits.fits(0, 0, 3))
+        self.assertFalse(bits.fits(self.geometry.index(1, 1), 0, 1))
+
+    def test_layers_follow_shots(self):
+        self.field.place_ship_on_field([(2, 2), (3, 2)])
+        bits = Bitboard.from_honeycomb(self.field)
+        self.assertEqual(8, len(bits.layout.cells(bits.halo)))
+        shooter = Player(PlayerType.USER, self.env)
+        for (x, y) in ((2, 2), (0, 0), (3, 2)):
+            self.field.fire_cell(x, y, shooter)
+            bits.fire(self.geometry.index(x, y))
+            self.assertEqual(bits.hit, Bitboard.from_honeycomb(
+                self.field).hit)
+        self.assertEqual([0], bits.layout.cells(bits.miss))
+        self.assertTrue(bits.is_fleet_dead())
+        self.assertEqual(self.geometry.square - 3,
+                         len(bits.layout.cells(bits.unknown())))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+from game.boardpool import BoardPool
+from game.environment import Environment, PlayerType
+
+
+class BoardPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = BoardPool(watermark=3, seed=2)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_refills_to_watermark(self):
+        self.pool.reserve(5, 3)
+        self.assertTrue(self.pool.wait_full(10))
+        self.assertEqual(3, len(self.pool))
+        self.assertIsNotNone(self.pool.take(5, 3))
+        self.assertTrue(self.pool.wait_full(10))
+        self.assertEqual(3, len(self.pool))
+
+    def test_pooled_fleet_is_placed(self):
+        for diff in (0, 1):
+            env = Environment(5, diff, 3)
+            env.pool = self.pool
+            env.add_player(PlayerType.USER, 'user')
+            env.add_player(PlayerType.BOT, 'bot')
+            for player in env.players.values():
+                if player.type == PlayerType.USER:
+                    self.assertTrue(player.field.auto_generate())
+                self.assertTrue(player.is_fleet_placed())
+                self.assertEqual(len(env.ship_cells),
+                                 len(player.field.ships))
+        self.assertEqual({(5, 3, 1), (5, 3, 8)}, set(self.pool.layouts))
+
+    def test_impossible_sizes(self):
+        self.assertIsNone(self.pool.take(2, 3))
+        self.assertTrue(self.pool.wait_full(10))
+        self.assertIn((2, 3, 1), self.pool.impossible)
+        self.assertIsNone(self.pool.take(2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import os
+import random
 import sys
 import unittest
 
@@ -6,8 +7,10 @@ sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
                              os.path.pardir))
 
 from game.environment import (Honeycomb, Environment, Cell, CellState,
-                              PlayerType, Player,
+                              PlayerType, Player, Color, HardBotAI,
                               FireResult, PlacementResult)
+from game.geometry import HexGeometry, get_geometry
+from game.placement import FleetGenerator
 from game.utils import Utils, TwitterUtils
 
 
@@ -20,6 +23,34 @@ class CellTest(unittest.TestCase):
         self.assertFalse(first != third)
 
 
+class HexGeometryTest(unittest.TestCase):
+    def test_square(self):
+        for side in (1, 3, 6):
+            self.assertEqual(3 * side * (side - 1) + 1,
+                             HexGeometry(side).square)
+
+    def test_index(self):
+        geom = HexGeometry(3)
+        for cell in range(geom.square):
+            self.assertEqual(cell, geom.index(*geom.coords(cell)))
+        self.assertEqual((2, 3), geom.coords(geom.index(2, 3)))
+
+    def test_corners(self):
+        geom = HexGeometry(3)
+        self.assertEqual(6, len(geom.corners))
+        self.assertIn(geom.index(4, 4), geom.corners)
+        self.assertNotIn(geom.index(3, 4), geom.corners)
+
+    def test_neighbours(self):
+        geom = get_geometry(3)
+        self.assertIs(geom, get_geometry(3))
+        near = {geom.coords(cell) for cell in geom.neighbours[
+            geom.index(2, 2)]}
+        self.assertEqual({(1, 1), (2, 1), (1, 2), (3, 2), (2, 3), (3, 3)},
+                         near)
+        self.assertEqual(3, len(geom.neighbours[geom.index(0, 0)]))
+
+
 class PlayerTest(unittest.TestCase):
     def test_bot_init_diff_right(self):
         env = Environment(3, 0, 2)
@@ -32,6 +63,11 @@ class PlayerTest(unittest.TestCase):
         self.assertEqual(env.players['bot'].AI.diff, env.diff)
         self.assertEqual(env.diff, 0)
 
+    def test_hard_bot_fleet_generated(self):
+        env = Environment(4, 1, 3)
+        env.add_player(PlayerType.BOT, 'bot')
+        self.assertTrue(env.players['bot'].is_fleet_placed())
+
     def test_ship_in_hand(self):
         env = Environment(3, 0, 2)
         env.add_player(PlayerType.USER, 'user')
@@ -72,6 +108,15 @@ class EnvironmentTest(unittest.TestCase):
         env.players['user'].field.fire_cell(1, 0, Player(PlayerType.BOT, env))
         self.assertTrue(env.players['user'].is_player_defeated())
 
+    def test_seeded_generation(self):
+        layouts = []
+        for _ in range(2):
+            env = Environment(6, 0, 4, seed=42)
+            env.add_player(PlayerType.BOT, 'bot')
+            layouts.append([ship.cells
+                            for ship in env.players['bot'].field.ships])
+        self.assertEqual(layouts[0], layouts[1])
+
     def test_fleet_placement(self):
         env = Environment(3, 0, 1)
         env.add_player(PlayerType.USER, 'user')
@@ -88,6 +133,81 @@ class EnvironmentTest(unittest.TestCase):
         self.assertFalse(env.players['user'].is_ship_in_hand(1))
 
 
+class HardBotAITest(unittest.TestCase):
+    def hunt(self, ship):
+        env = Environment(5, 0, 3, seed=1)
+        env.add_player(PlayerType.USER, 'user')
+        env.add_player(PlayerType.USER, 'shooter')
+        env.players['shooter'].active = True
+        field = env.players['user'].field
+        field.place_ship_on_field(ship)
+        bot = HardBotAI(env.players['shooter'])
+        cell = field.geometry.index(*ship[1])
+        bot.hits = [cell]
+        bot.update_frontier(field, env.random)
+        field.fire_cell(*ship[1], env.players['shooter'])
+        shots = 0
+        while not field.ships[0].is_dead():
+            bot.fire(env)
+            shots += 1
+        return bot, shots
+
+    def test_hunt_follows_axis(self):
+        for ship in ([(1, 2), (2, 3), (3, 4)], [(1, 3), (2, 3), (3, 3)]):
+            bot, shots = self.hunt(ship)
+            self.assertLessEqual(shots, 6 + 1)
+            self.assertEqual([], bot.hits)
+
+    def test_frontier_on_axis(self):
+        env = Environment(5, 0, 3)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        geom = field.geometry
+        bot = HardBotAI(Player(PlayerType.USER, env))
+        bot.hits = [geom.index(2, 2), geom.index(2, 3)]
+        bot.update_frontier(field, env.random)
+        self.assertEqual({(2, 1), (2, 4)},
+                         {geom.coords(cell) for cell in bot.frontier})
+
+
+class DensityBotAITest(unittest.TestCase):
+    def brute_density(self, bot):
+        geom = bot.geometry
+        density = [0] * geom.square
+        for length, count in bot.remaining.items():
+            for anchor in range(geom.square):
+                for rotation in range(3):
+                    cells = geom.ship_cells(anchor, rotation, length)
+                    if cells and not any(bot.known[c] for c in cells):
+                        for cell in cells:
+                            density[cell] += count
+        return density
+
+    def test_density_follows_shots(self):
+        env = Environment(4, 2, 3, seed=2)
+        env.add_player(PlayerType.USER, 'user')
+        env.add_player(PlayerType.BOT, 'bot')
+        env.players['user'].field.auto_generate()
+        env.players['bot'].active = True
+        bot = env.players['bot'].bot
+        for _ in range(12):
+            bot.fire(env)
+            self.assertEqual(self.brute_density(bot), bot.density)
+
+    def test_finishes_game(self):
+        env = Environment(5, 2, 3, seed=4)
+        env.add_player(PlayerType.USER, 'user')
+        env.add_player(PlayerType.BOT, 'bot')
+        env.players['user'].field.auto_generate()
+        env.players['bot'].active = True
+        user = env.players['user']
+        for _ in range(user.field.square):
+            env.players['bot'].bot.fire(env)
+            if user.is_player_defeated():
+                break
+        self.assertTrue(user.is_player_defeated())
+
+
 class UtilsTest(unittest.TestCase):
     def test_num_to_letter(self):
         self.assertEqual('A', Utils.number_to_letters(0))
@@ -122,6 +242,22 @@ class HoneycombTest(unittest.TestCase):
             env.players['user'].field.place_ship_on_field([(0, 5)]),
             PlacementResult.UNABLE)
 
+    def test_place_far_corner_ship(self):
+        env = Environment(3, 0, 1)
+        env.add_player(PlayerType.USER, 'user')
+        self.assertEqual(
+            env.players['user'].field.place_ship_on_field([(4, 4)]),
+            PlacementResult.UNABLE)
+
+    def test_cell_view(self):
+        env = Environment(3, 0, 1)
+        field = Honeycomb(3, Player(PlayerType.USER, env), env)
+        field.field[3][2].state = CellState.SHIP
+        self.assertEqual(CellState.SHIP, field.get_state(2, 3))
+        self.assertEqual(CellState.NOT_FIELD, field.field[3][0].state)
+        self.assertEqual(CellState.NOT_FIELD, field.get_state(0, 4))
+        self.assertEqual(5, len(field.field[3]))
+
     def test_place_1_ship(self):
         env = Environment(5, 0, 2)
         env.add_player(PlayerType.USER, 'user')
@@ -144,6 +280,17 @@ class HoneycombTest(unittest.TestCase):
             env.players['user'].field.place_ship_on_field([(1, 3), (2, 3)]),
             PlacementResult.SUCCESS)
 
+    def test_place_ship_hex_neighbourhood(self):
+        env = Environment(5, 0, 2)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        self.assertEqual(field.place_ship_on_field([(2, 3)]),
+                         PlacementResult.SUCCESS)
+        self.assertEqual(field.place_ship_on_field([(3, 2)]),
+                         PlacementResult.SUCCESS)
+        self.assertEqual(field.place_ship_on_field([(3, 4), (4, 4)]),
+                         PlacementResult.UNABLE)
+
     def test_bound(self):
         env = Environment(3, 0, 1)
         field = Honeycomb(3, Player(PlayerType.USER, env), env)
@@ -152,6 +299,32 @@ class HoneycombTest(unittest.TestCase):
         self.assertFalse(field.is_in_bound(-1, 1))
         self.assertFalse(field.is_in_bound(4, 6))
 
+    def test_auto_generate(self):
+        env = Environment(8, 0, 5)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        self.assertTrue(field.auto_generate())
+        self.assertTrue(env.players['user'].is_fleet_placed())
+        self.assertEqual(env.ships_count, len(field.ships))
+        for cell in range(field.square):
+            if field.ship_at[cell] == -1:
+                continue
+            for near in field.geometry.neighbours[cell]:
+                self.assertIn(field.ship_at[near],
+                              (-1, field.ship_at[cell]))
+
+    def test_generator_impossible_hand(self):
+        env = Environment(2, 0, 1)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        self.assertIsNone(
+            FleetGenerator(field, random.Random(1)).generate([3, 3]))
+        env.players['user'].active = True
+        env.players['user'].hand = [3, 3]
+        self.assertFalse(env.generate_user_field())
+        self.assertEqual([], field.ships)
+        self.assertEqual([3, 3], env.players['user'].hand)
+
     def test_fire_not_destroyed(self):
         env = Environment(5, 0, 2)
         env.add_player(PlayerType.USER, 'user')
@@ -172,6 +345,82 @@ class HoneycombTest(unittest.TestCase):
         self.assertTrue(env.players['user'].is_player_defeated())
         self.assertEqual(FireResult.DESTROYED, state)
 
+    def test_fire_destroys_whole_ship(self):
+        env = Environment(5, 0, 3)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        field.place_ship_on_field([(2, 2), (2, 3), (2, 4)])
+        self.assertEqual(1, len(field.ships))
+        self.assertEqual(3, len(field.ships[0]))
+        shooter = Player(PlayerType.BOT, env)
+        self.assertEqual(FireResult.HIT, field.fire_cell(2, 4, shooter))
+        self.assertEqual(FireResult.HIT, field.fire_cell(2, 2, shooter))
+        self.assertEqual(CellState.FIRED, field.get_state(2, 2))
+        self.assertFalse(field.is_ship_dead(2, 2))
+        self.assertEqual(FireResult.DESTROYED,
+                         field.fire_cell(2, 3, shooter))
+        self.assertTrue(field.is_ship_dead(2, 2))
+        for y in (2, 3, 4):
+            self.assertEqual(CellState.DEAD, field.get_state(2, y))
+        self.assertEqual(Color.RED, field.cell(1, 3).color)
+
+    def test_rejected_corner_ship_not_counted(self):
+        env = Environment(6, 0, 4)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        field.place_ship_on_field([(3, 0)])
+        self.assertEqual(field.place_ship_on_field([(0, 0), (1, 0), (2, 0)]),
+                         PlacementResult.UNABLE)
+        self.assertEqual(0, field.corner_ships_count)
+        self.assertEqual(field.place_ship_on_field([(0, 0)]),
+                         PlacementResult.SUCCESS)
+        self.assertEqual(1, field.corner_ships_count)
+
+    def test_legal_placements_kept_up_to_date(self):
+        env = Environment(6, 0, 4)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        before = {length: set(field.legal_placements(length))
+                  for length in (1, 2, 4)}
+        field.place_ship_on_field([(2, 2), (3, 3), (4, 4)])
+        field.place_ship_on_field([(0, 0)])
+        cached = {length: field.legal_placements(length)
+                  for length in (1, 2, 4)}
+        field.legal.clear()
+        for length, placements in cached.items():
+            self.assertEqual(field.legal_placements(length), placements)
+            self.assertLess(placements, before[length])
+        corner = field.geometry.index(10, 10) * 3
+        self.assertIn(corner, before[1])
+        self.assertNotIn(corner, cached[1])
+        key = field.geometry.index(6, 8) * 3 + 1
+        self.assertIn(key, cached[2])
+        self.assertEqual(field.place_ship_on_field([(6, 9), (6, 8)]),
+                         PlacementResult.SUCCESS)
+        self.assertNotIn(key, field.legal_placements(2))
+
+    def test_unshot_index(self):
+        env = Environment(3, 0, 1)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        self.assertEqual(field.square, len(field.unshot))
+        shooter = Player(PlayerType.USER, env)
+        field.fire_cell(1, 1, shooter)
+        field.fire_cell(1, 1, shooter)
+        self.assertEqual(field.square - 1, len(field.unshot))
+        self.assertNotIn(field.geometry.index(1, 1), field.unshot)
+
+    def test_simple_bot_never_unable(self):
+        env = Environment(3, 0, 1, seed=1)
+        env.add_player(PlayerType.USER, 'user')
+        env.add_player(PlayerType.BOT, 'bot')
+        env.players['bot'].active = True
+        field = env.players['user'].field
+        for _ in range(field.square):
+            self.assertNotEqual(FireResult.UNABLE,
+                                env.players['bot'].bot.fire(env))
+        self.assertEqual(0, len(field.unshot))
+
     def test_fire_twice(self):
         env = Environment(5, 0, 1)
         env.add_player(PlayerType.USER, 'user')
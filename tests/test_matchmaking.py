@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+from game.utils import Utils
+from network.server import GameServer
+from test_server import Client
+
+
+class MatchmakerTest(unittest.TestCase):
+    def run_game(self, scenario, clients=2, bot_timeout=10.0):
+        async def main():
+            server = GameServer(side=4, ship_max=2, seed=1,
+                                bot_timeout=bot_timeout, bot_workers=2)
+            tcp = await server.start('localhost', 0)
+            port = tcp.sockets[0].getsockname()[1]
+            connected = [Client(*await asyncio.open_connection('localhost',
+                                                                port))
+                         for _ in range(clients)]
+            try:
+                await asyncio.wait_for(scenario(server, *connected), 10)
+            finally:
+                for client in connected:
+                    client.writer.close()
+                tcp.close()
+                await tcp.wait_closed()
+                server.close()
+
+        asyncio.run(main())
+
+    async def play_with_bot(self, client):
+        """Fire at every cell until the game ends, returns the last event"""
+        self.assertEqual('ok', (await client.command('auto'))[1])
+        cells = [(x, y) for y in range(7) for x in range(7)]
+        while True:
+            event = await client.read_event()
+            if event in ('you won!', 'you lost'):
+                return event
+            if event != 'your move':
+                continue
+            while True:
+                x, y = cells.pop()
+                output, status = await client.command(
+                    f'fire {x + 1} {Utils.number_to_letters(y)}')
+                if status != 'ok':
+                    continue
+                if output == ['missed ship'] or 'you won!' in client.events:
+                    break
+
+    def test_humans_paired(self):
+        async def scenario(server, first, second, third):
+            self.assertEqual((['waiting for opponent'], 'ok'),
+                             await first.command('find ann'))
+            self.assertEqual(([], 'error: already waiting for a game'),
+                             await first.command('find ann'))
+            self.assertEqual((['waiting for opponent'], 'ok'),
+                             await third.command('find cid 5 2'))
+            self.assertEqual(([], 'ok'), await second.command('find bob'))
+            self.assertEqual('game started, place your fleet',
+                             await first.read_event())
+            self.assertEqual('game started, place your fleet',
+                             await second.read_event())
+            self.assertEqual('ok', (await first.command('show other'))[1])
+            self.assertEqual(1, len(server.matchmaker.tickets))
+            third.writer.write(b'quit\n')
+            await third.reader.read()
+            self.assertEqual({}, server.matchmaker.tickets)
+            self.assertEqual({}, server.matchmaker.queues)
+
+        self.run_game(scenario, clients=3)
+
+    def test_bot_after_timeout(self):
+        async def scenario(server, client):
+            self.assertEqual((['waiting for opponent'], 'ok'),
+                             await client.command('find ann 4 2 human 1'))
+            self.assertEqual('no opponent found, playing with a bot',
+                             await client.read_event())
+            self.assertEqual('game started, place your fleet',
+                             await client.read_event())
+            self.assertIn(await self.play_with_bot(client),
+                          ('you won!', 'you lost'))
+            self.assertEqual({}, server.matchmaker.tickets)
+
+        self.run_game(scenario, clients=1, bot_timeout=0.05)
+
+    def test_bot_game(self):
+        async def scenario(server, client):
+            self.assertEqual((['looking for a bot opponent'], 'ok'),
+                             await client.command('find ann bot 2'))
+            self.assertEqual('game started, place your fleet',
+                             await client.read_event())
+            self.assertEqual({}, server.matchmaker.tickets)
+            self.assertIn(await self.play_with_bot(client),
+                          ('you won!', 'you lost'))
+            self.assertEqual(([], 'error: impossible size values'),
+                             await client.command('find ann 3 9'))
+            self.assertEqual((['looking for a bot opponent'], 'ok'),
+                             await client.command('find ann bot'))
+
+        self.run_game(scenario, clients=1)
+
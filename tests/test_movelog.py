@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+from game.environment import Environment, PlayerType
+from game.movelog import PLACE, SHOT, MoveLog, Replay
+from game.simulation import build_environment, play_game, simulate
+
+
+def same_state(test, env, other):
+    for name, player in env.players.items():
+        restored = other.players[name]
+        test.assertEqual(player.field.states, restored.field.states)
+        test.assertEqual(player.field.colors, restored.field.colors)
+        test.assertEqual(player.shots_count, restored.shots_count)
+        test.assertEqual(player.missed_count, restored.missed_count)
+        test.assertEqual(player.fleet, restored.fleet)
+
+
+class MoveLogTest(unittest.TestCase):
+    def test_records_placements(self):
+        env = Environment(5, 0, 2)
+        env.add_player(PlayerType.USER, 'user')
+        log = MoveLog()
+        log.start(env)
+        field = env.players['user'].field
+        field.place_ship_on_field([(2, 3), (2, 2)])
+        field.place_ship_on_field([(0, 0)])
+        field.place_ship_on_field([(4, 4)])
+        self.assertEqual(2, len(log))
+        geom = field.geometry
+        self.assertEqual((PLACE, 0, 0, 1, 2, geom.index(2, 2)),
+                         log.record(0))
+        self.assertEqual([1], Replay(log).state(2).players['user'].hand)
+
+    def test_replay_matches_game(self):
+        env = build_environment(5, 3, (0, 1), seed=2)
+        log = MoveLog(keyframe_every=8)
+        log.start(env)
+        play_game(env)
+        log.close()
+        self.assertIsNone(env.log)
+        self.assertGreater(len(log.keyframes), 2)
+        self.assertEqual(SHOT, log.record(0)[0])
+        replay = Replay(log)
+        same_state(self, env, replay.state(len(replay)))
+
+        single = MoveLog()
+        single.records = log.records
+        single.keyframes = log.keyframes[:1]
+        for moves in (0, 7, 8, 9, len(replay) // 2, len(replay)):
+            env = replay.state(moves)
+            other = Replay(single).state(moves)
+            same_state(self, env, other)
+            self.assertEqual(
+                [player.active for player in env.players.values()],
+                [player.active for player in other.players.values()])
+        with self.assertRaises(IndexError):
+            replay.state(len(replay) + 1)
+
+    def test_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            simulate(2, 4, 2, (0, 2), seed=3, log_dir=directory)
+            names = sorted(name for name in os.listdir(directory)
+                           if name.endswith('.log'))
+            self.assertEqual(2, len(names))
+            log = MoveLog.open(os.path.join(directory, names[0]))
+        env = Replay(log).state(len(log))
+        self.assertTrue(any(player.is_player_defeated()
+                            for player in env.players.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
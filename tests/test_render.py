@@ -0,0 +1,116 @@
+import os
+import re
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+from game.environment import Environment, Player, PlayerType
+from game.render import (CLEAR_SCREEN, BoardRenderer, TerminalPainter,
+                         get_frame)
+
+
+class BoardRendererTest(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(4, 0, 2)
+        self.env.add_player(PlayerType.USER, 'user')
+        self.player = self.env.players['user']
+        self.player.active = True
+        self.field = self.player.field
+
+    def test_frame_cached(self):
+        self.assertIs(get_frame(4), get_frame(4))
+        self.assertEqual(7, len(get_frame(4).prefixes))
+
+    def test_only_changed_rows_rerendered(self):
+        renderer = BoardRenderer(self.field)
+        renderer.render()
+        rows = list(renderer.rows)
+        self.field.fire_cell(1, 2, Player(PlayerType.USER, self.env))
+        board = renderer.render()
+        self.assertIsNot(rows[2], renderer.rows[2])
+        for y in (0, 3, 6):
+            self.assertIs(rows[y], renderer.rows[y])
+        self.assertIn('M', renderer.rows[2])
+        self.assertEqual(board, str(self.field))
+
+    def test_view_mode_change(self):
+        self.field.place_ship_on_field([(1, 1)])
+        self.assertIn('S', str(self.field))
+        self.player.active = False
+        self.assertNotIn('S', str(self.field))
+
+
+
+def emulate(screen, output):
+    """Apply terminal output to ``screen``, a list of character lists,
+    ignoring colors"""
+    row = col = 0
+    for token in re.findall(r'\x1b\[[0-9;]*[A-Za-z]|\n|[^\x1b\n]', output):
+        if token == '\n':
+            row, col = row + 1, 0
+        elif token == '\x1b[2J':
+            screen.clear()
+        elif token.endswith('H'):
+            args = token[2:-1]
+            row, col = ((int(n) - 1 for n in args.split(';'))
+                        if args else (0, 0))
+        elif token == '\x1b[J':
+            del screen[row + 1:]
+            if row < len(screen):
+                del screen[row][col:]
+        elif not token.startswith('\x1b'):
+            while len(screen) <= row:
+                screen.append([])
+            line = screen[row]
+            line.extend(' ' * (col + 1 - len(line)))
+            line[col] = token
+            col += 1
+    return screen
+
+
+def screen_text(screen):
+    return '\n'.join(''.join(line).rstrip() for line in screen).rstrip()
+
+
+def plain(board):
+    return '\n'.join(line.rstrip() for line in
+                     re.sub(r'\x1b\[[0-9;]*m', '', str(board)).split('\n')
+                     ).rstrip()
+
+
+class TerminalPainterTest(unittest.TestCase):
+    def setUp(self):
+        self.env = Environment(4, 0, 2)
+        self.env.add_player(PlayerType.USER, 'user')
+        self.player = self.env.players['user']
+        self.player.active = True
+        self.field = self.player.field
+        self.shooter = Player(PlayerType.USER, self.env)
+
+    def test_first_paint_is_full(self):
+        output = TerminalPainter().paint(self.field)
+        self.assertTrue(output.startswith(CLEAR_SCREEN))
+        self.assertEqual(plain(self.field), screen_text(emulate([], output)))
+
+    def test_repaints_only_changed_cells(self):
+        painter = TerminalPainter()
+        screen = emulate([], painter.paint(self.field))
+        self.field.fire_cell(1, 2, self.shooter)
+        self.field.fire_cell(5, 6, self.shooter)
+        output = painter.paint(self.field)
+        self.assertNotIn(CLEAR_SCREEN, output)
+        self.assertEqual(2, output.count('M'))
+        emulate(screen, output)
+        self.assertEqual(plain(self.field), screen_text(screen))
+
+    def test_full_paint_after_reset(self):
+        painter = TerminalPainter()
+        painter.paint(self.field)
+        painter.reset()
+        self.assertTrue(painter.paint(self.field).startswith(CLEAR_SCREEN))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+from game.utils import Utils
+from network.server import GameServer
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.events = []
+
+    async def command(self, line):
+        """Output lines of the command and its status line"""
+        self.writer.write((line + '\n').encode())
+        output = []
+        while True:
+            reply = (await self.reader.readline()).decode().rstrip('\n')
+            if reply.startswith('event: '):
+                self.events.append(reply[len('event: '):])
+            elif reply == 'ok' or reply.startswith('error: '):
+                return output, reply
+            else:
+                output.append(reply)
+
+    async def read_event(self):
+        while not self.events:
+            reply = (await self.reader.readline()).decode().rstrip('\n')
+            self.events.append(reply[len('event: '):])
+        return self.events.pop(0)
+
+
+class GameServerTest(unittest.TestCase):
+    def run_game(self, scenario):
+        async def main():
+            server = GameServer(side=4, ship_max=2, seed=1)
+            tcp = await server.start('localhost', 0)
+            port = tcp.sockets[0].getsockname()[1]
+            clients = [Client(*await asyncio.open_connection('localhost',
+                                                              port))
+                       for _ in range(2)]
+            try:
+                await asyncio.wait_for(scenario(server, *clients), 10)
+            finally:
+                for client in clients:
+                    client.writer.close()
+                tcp.close()
+                await tcp.wait_closed()
+                server.close()
+
+        asyncio.run(main())
+
+    def test_full_game(self):
+        async def scenario(server, first, second):
+            self.assertEqual((['waiting for opponent'], 'ok'),
+                             await first.command('join room1 ann'))
+            self.assertEqual(([], 'error: name ann is taken'),
+                             await second.command('join room1 ann'))
+            self.assertEqual('ok', (await second.command('join room1 bob'))[1])
+            self.assertEqual('game started, place your fleet',
+                             await first.read_event())
+            self.assertEqual('error: fleets are not placed yet',
+                             (await first.command('fire 1 A'))[1])
+            self.assertEqual('ok', (await first.command('place 2 h 2 B'))[1])
+            self.assertTrue((await first.command('place 2 h 2 B'))[1]
+                            .startswith('error: '))
+            self.assertEqual('ok', (await first.command('auto'))[1])
+            self.assertEqual('ok', (await second.command('auto'))[1])
+            output, _ = await first.command('show my')
+            self.assertIn('S', ''.join(output))
+            output, _ = await second.command('show other')
+            self.assertNotIn('S', ''.join(output))
+            self.assertEqual('error: not your move',
+                             (await second.command('fire 1 A'))[1])
+
+            players = {'ann': first, 'bob': second}
+            shots = {name: [(x, y) for y in range(7) for x in range(7)
+                            if server.rooms['room1'].env.players[name]
+                            .field.is_in_bound(x, y)]
+                     for name in players}
+            turn = 'ann'
+            while True:
+                x, y = shots['bob' if turn == 'ann' else 'ann'].pop()
+                output, status = await players[turn].command(
+                    f'fire {x + 1} {Utils.number_to_letters(y)}')
+                self.assertEqual('ok', status)
+                if 'you won!' in players[turn].events:
+                    break
+                if output == ['missed ship']:
+                    turn = 'bob' if turn == 'ann' else 'ann'
+            loser = second if turn == 'ann' else first
+            while await loser.read_event() != 'you lost':
+                pass
+            self.assertEqual('error: game is over',
+                             (await loser.command('fire 1 A'))[1])
+            output, _ = await first.command('stat')
+            self.assertEqual(['ann:', 'bob:'], output[0::3])
+
+        self.run_game(scenario)
+
+    def test_opponent_leaves(self):
+        async def scenario(server, first, second):
+            await first.command('join r ann')
+            await second.command('join r bob 5 2')
+            self.assertEqual(4, server.rooms['r'].env.side)
+            self.assertEqual(([], 'error: already in a game'),
+                             await first.command('join other ann'))
+            second.writer.write(b'quit\n')
+            self.assertEqual('game started, place your fleet',
+                             await first.read_event())
+            self.assertEqual('bob left the game', await first.read_event())
+            self.assertNotIn('r', server.rooms)
+            self.assertEqual(([], 'error: impossible size values'),
+                             await first.command('join other ann 3 9'))
+            self.assertEqual((['waiting for opponent'], 'ok'),
+                             await first.command('join other ann 3 1'))
+            self.assertEqual(3, server.rooms['other'].env.side)
+
+        self.run_game(scenario)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+from game.simulation import (build_environment, play_batch, play_game,
+                             simulate, simulate_parallel, SimulationStats)
+
+
+class SimulationTest(unittest.TestCase):
+    def test_play_game(self):
+        env = build_environment(4, 2, (0, 1), seed=3)
+        winner, shots = play_game(env)
+        loser = env.players[f'bot{1 - winner}']
+        self.assertTrue(loser.is_player_defeated())
+        self.assertGreaterEqual(shots, sum(env.ship_cells))
+
+    def test_simulate(self):
+        stats = simulate(10, 4, 2, (0, 1), seed=5)
+        self.assertEqual(10, stats.games)
+        self.assertEqual(10, sum(stats.wins))
+        self.assertAlmostEqual(1.0, sum(stats.win_rates()))
+
+    def test_simulate_reproducible(self):
+        first = simulate(5, 4, 2, (0, 0), seed=7)
+        second = simulate(5, 4, 2, (0, 0), seed=7)
+        self.assertEqual(first.wins, second.wins)
+        self.assertEqual(first.winner_shots, second.winner_shots)
+
+    def test_play_batch(self):
+        stats = SimulationStats((0, 1))
+        stats.add_batch(play_batch(4, 2, (0, 1), 11, 4))
+        self.assertEqual(4, stats.games)
+        self.assertGreater(stats.mean_shots, 0)
+
+    def test_simulate_parallel(self):
+        first = simulate_parallel(6, 4, 2, (0, 1), seed=9, workers=2,
+                                  batch_size=2)
+        second = simulate_parallel(6, 4, 2, (0, 1), seed=9, workers=1,
+                                   batch_size=2)
+        self.assertEqual(6, first.games)
+        self.assertEqual(first.wins, second.wins)
+        self.assertEqual(first.winner_shots, second.winner_shots)
+
+
+if __name__ == '__main__':
+    unittest.main()
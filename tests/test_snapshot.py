@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             os.path.pardir))
+
+from game.snapshot import dumps, load, loads, save
+from game.environment import CellState, Environment, PlayerType
+from game.simulation import build_environment, play_game
+
+
+def fire(env, shots):
+    for _ in range(shots):
+        env.players['bot0'].bot.fire(env)
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_round_trip(self):
+        env = build_environment(5, 3, (0, 1), seed=4)
+        fire(env, 15)
+        data = dumps(env, 'bot')
+        restored, mode = loads(data)
+        self.assertEqual('bot', mode)
+        self.assertEqual(4, restored.seed)
+        self.assertEqual(data, dumps(restored, 'bot'))
+        for name, player in env.players.items():
+            other = restored.players[name]
+            self.assertEqual(player.active, other.active)
+            self.assertEqual(player.shots_count, other.shots_count)
+            self.assertEqual(player.fleet, other.fleet)
+            self.assertEqual(player.field.states, other.field.states)
+            self.assertEqual([ship.cells for ship in player.field.ships],
+                             [ship.cells for ship in other.field.ships])
+            self.assertEqual(str(player.field), str(other.field))
+        self.assertEqual(1, restored.players['bot1'].AI.diff)
+
+    def test_restored_game_plays_on_identically(self):
+        env = build_environment(5, 3, (0, 0), seed=8)
+        fire(env, 10)
+        restored, _ = loads(dumps(env))
+        self.assertEqual(play_game(env), play_game(restored))
+
+    def test_hand_kept(self):
+        env = Environment(5, 0, 3)
+        env.add_player(PlayerType.USER, 'user')
+        field = env.players['user'].field
+        field.place_ship_on_field([(2, 2), (3, 2), (4, 2)])
+        restored, _ = loads(dumps(env))
+        user = restored.players['user']
+        self.assertEqual([2, 2, 1, 1, 1], user.hand)
+        self.assertEqual(CellState.SHIP, user.field.get_state(3, 2))
+        self.assertNotIn(field.geometry.index(1, 2) * 3,
+                         user.field.legal_placements(1))
+
+    def test_file(self):
+        env = build_environment(4, 2, (0, 2), seed=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'game.bin')
+            save(path, env, 'hs')
+            restored, mode = load(path)
+        self.assertEqual('hs', mode)
+        winner, _ = play_game(restored)
+        self.assertTrue(
+            restored.players[f'bot{1 - winner}'].is_player_defeated())
+
+    def test_broken(self):
+        data = dumps(build_environment(4, 2, (0, 0), seed=1))
+        with self.assertRaises(ValueError):
+            loads(b'XXXX' + data[4:])
+        with self.assertRaises(ValueError):
+            loads(data[:-1])
+
+
+if __name__ == '__main__':
+    unittest.main()